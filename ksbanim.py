@@ -4,9 +4,14 @@ import traceback
 import random
 import threading
 import os
-import struct
 import copy 
 import atexit 
+import ctypes
+import heapq
+import hashlib
+import itertools
+import re
+from collections import OrderedDict
 from abc import ABC, abstractmethod 
 from importlib.metadata import version
 import requests
@@ -64,7 +69,7 @@ def update_package():
 from OpenGL.GL import *
 
 from PyQt5.QtWidgets import QApplication, QDesktopWidget, QDockWidget, QOpenGLWidget
-from PyQt5.QtGui import QPainter, QColor, QFont, QFontMetrics, QSurfaceFormat, QOpenGLContext, QImage
+from PyQt5.QtGui import QPainter, QColor, QFont, QFontMetrics, QFontMetricsF, QSurfaceFormat, QOpenGLContext, QImage
 from PyQt5.QtCore import Qt, QTimer, QElapsedTimer, QBuffer
 
 import imageio
@@ -121,15 +126,21 @@ def smooth(begin_value, end_value, fraction):
 
 INTERPOLATION_FUNCTION = smooth
 
+def linear_array(fraction):
+    return fraction
+
+def smooth_array(fraction):
+    return np.where(fraction < 0.5, 4 * fraction * fraction * fraction, (fraction - 1) * (2 * fraction - 2) * (2 * fraction - 2) + 1)
+
+# vectorized easing curves for kInterpolationEngine, keyed by INTERPOLATION_FUNCTION
+EASING_ARRAY_FUNCTIONS = {
+    linear: linear_array,
+    smooth: smooth_array,
+}
+
 class kBreak:
     def __init__(self):        
-        max_end_time = 0
-        for action in action_queue.queue:
-            max_time = action.begin_time 
-            if hasattr(action, "end_time"):
-                max_time += action.end_time - action.begin_time
-            if max_time > max_end_time:
-                max_end_time = max_time 
+        max_end_time = action_queue.getHorizon()
 
         self.begin_time = max_end_time
         kstore.milliseconds = max_end_time - kstore.delay
@@ -149,28 +160,205 @@ class kInterpolator:
         self.getter = getter
         self.setter = setter
         self.begin_value = getter()
+        self.group = None
+        self.row = None
+
+    def activate(self):
+        self.begin_value = self.getter()
+        interpolation_engine.add(self)
+
+    def deactivate(self):
+        interpolation_engine.remove(self)
         
     def process(self, the_time):
         if the_time >= self.end_time:
+            self.deactivate()
             value = interpolate(self.begin_value, self.end_value, 1)
             self.setter(value)
 
             return -1 
-        elif the_time < self.begin_time:
-            self.begin_value = self.getter()
-            return 0
-        
-        fraction = (the_time - self.begin_time)/self.dt
 
-        value = interpolate(self.begin_value, self.end_value, fraction)
+        group = self.group
+        value = None
+        if group is not None and group.time == the_time and self.row < len(group.values):
+            value = group.values[self.row]
+        if value is None:
+            fraction = (the_time - self.begin_time)/self.dt
+            value = interpolate(self.begin_value, self.end_value, fraction)
 
         self.setter(value)
 
         return 1
-    
+
+class kInterpolationGroup:
+    """
+        the rows of the running kInterpolators of one value shape: a member is appended, when it starts,
+        and replaced by the last row, when it finishes, so the arrays are never rebuilt
+    """
+    def __init__(self, length):
+        self.length = length  # 0 for scalars, else number of components
+        self.members = []  # the interpolator of each row
+        self.time = None
+        self.values = []  # rows evaluated at self.time, None for rows, which moved in afterwards
+
+        width = max(1, length)
+        self.begin = np.empty((0, width), dtype=np.float64)
+        self.end = np.empty((0, width), dtype=np.float64)
+        self.begin_times = np.empty(0, dtype=np.float64)
+        self.durations = np.empty(0, dtype=np.float64)
+
+    def _grow(self):
+        capacity = max(16, 2 * len(self.begin_times))
+        count = len(self.members)
+
+        def grown(array):
+            result = np.empty((capacity,) + array.shape[1:], dtype=np.float64)
+            result[:count] = array[:count]
+            return result
+
+        self.begin = grown(self.begin)
+        self.end = grown(self.end)
+        self.begin_times = grown(self.begin_times)
+        self.durations = grown(self.durations)
+
+    def add(self, interpolator):
+        row = len(self.members)
+        if row == len(self.begin_times):
+            self._grow()
+
+        self.begin[row] = interpolator.begin_array
+        self.end[row] = interpolator.end_array
+        self.begin_times[row] = interpolator.begin_time
+        self.durations[row] = interpolator.dt if interpolator.dt > 0 else 1
+
+        self.members.append(interpolator)
+        interpolator.group = self
+        interpolator.row = row
+
+    def remove(self, interpolator):
+        row = interpolator.row
+        if interpolator.group is not self or row is None:
+            return
+
+        last = len(self.members) - 1
+        if row != last:
+            moved = self.members[last]
+            self.members[row] = moved
+            moved.row = row
+            self.begin[row] = self.begin[last]
+            self.end[row] = self.end[last]
+            self.begin_times[row] = self.begin_times[last]
+            self.durations[row] = self.durations[last]
+            if row < len(self.values):
+                self.values[row] = self.values[last] if last < len(self.values) else None
+
+        self.members.pop()
+        del self.values[last:]
+        interpolator.group = None
+        interpolator.row = None
+
+    def evaluate(self, the_time, easing):
+        count = len(self.members)
+
+        fraction = np.clip((the_time - self.begin_times[:count]) / self.durations[:count], 0, 1)
+        fraction = easing(fraction)[:, None]
+        values = self.end[:count] * fraction + self.begin[:count] * (1 - fraction)
+
+        if self.length == 0:
+            self.values = values[:, 0].tolist()
+        else:
+            self.values = values.tolist()
+        self.time = the_time
+
+class kInterpolationEngine:
+    """
+        evaluates all running kInterpolators of the same value shape (scalar, vec2, rgba, vecN) in one numpy operation per frame
+    """
+    def __init__(self):
+        self.groups = {}
+
+    def _toArrays(self, begin_value, end_value):
+        def is_number(value):
+            return isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+
+        if is_number(begin_value) and is_number(end_value):
+            return 0, [begin_value], [end_value]
+
+        if not isinstance(begin_value, (list, tuple, np.ndarray)) or not isinstance(end_value, (list, tuple, np.ndarray)):
+            return None
+
+        begin_value = list(begin_value)
+        end_value = list(end_value)
+        if not all(is_number(value) for value in begin_value + end_value):
+            return None
+
+        # same padding as interpolate()
+        length = max(len(begin_value), len(end_value))
+        if length == 0:
+            return None
+        begin_value = begin_value + [begin_value[-1] if begin_value else 0] * (length - len(begin_value))
+        end_value = end_value + [end_value[-1] if end_value else 0] * (length - len(end_value))
+
+        return length, begin_value, end_value
+
+    def add(self, interpolator):
+        self.remove(interpolator)
+
+        arrays = self._toArrays(interpolator.begin_value, interpolator.end_value)
+        if arrays is None:
+            return
+
+        length, interpolator.begin_array, interpolator.end_array = arrays
+        if length not in self.groups:
+            self.groups[length] = kInterpolationGroup(length)
+        self.groups[length].add(interpolator)
+
+    def remove(self, interpolator):
+        if interpolator.group is not None:
+            interpolator.group.remove(interpolator)
+
+    def evaluate(self, the_time):
+        easing = EASING_ARRAY_FUNCTIONS.get(INTERPOLATION_FUNCTION)
+        if easing is None:
+            return
+
+        for group in self.groups.values():
+            if group.members:
+                group.evaluate(the_time, easing)
+
+interpolation_engine = kInterpolationEngine()
    
+class kVertexMorph:
+    """
+        a morph, which the renderer blends on the graphics card: begin and end are uploaded once, afterwards only the fraction changes
+    """
+    def __init__(self, begin, end):
+        self.begin = begin
+        self.end = end
+        self.fraction = 0
+        self.vbo = None
+        self.vertices = None
+
+        # every blended outline lies within the box around begin and end
+        low = np.minimum(begin.min(axis=0), end.min(axis=0)) if len(begin) else np.zeros(2)
+        high = np.maximum(begin.max(axis=0), end.max(axis=0)) if len(begin) else np.zeros(2)
+        self.box = (float(low[0]), float(low[1]), float(high[0]), float(high[1]))
+
+    def getVertices(self):
+        # only computed on the cpu, if somebody asks (e.g. contains or another morph starting from here)
+        if self.vertices is None or self.vertices[0] != self.fraction:
+            self.vertices = (self.fraction, toVertexArray((1 - self.fraction) * self.begin + self.fraction * self.end))
+        return self.vertices[1]
+
 class kShapeMatcher:
-    def __init__(self, end_value, getter, setter):
+    def __init__(self, end_value, getter, setter, alignment="fft", shape=None):
+        if alignment not in ("fft", "exact"):
+            raise ValueError("alignment must be \"fft\" or \"exact\"")
+
+        self.shape = shape
+        self.gpu = False
+        self.morph = None  # the kVertexMorph of this matcher (another matcher of the shape may replace it)
+        self.alignment = alignment
         self.begin_time = kstore.milliseconds
         self.end_time = kstore.animation + self.begin_time
         self.dt = self.end_time - self.begin_time
@@ -178,61 +366,76 @@ class kShapeMatcher:
         self.getter = getter
         self.setter = setter
         self.begin_value = getter()
+        self.plan = None
+        self.prepared = False
+
+    def activate(self):
+        self.begin_value = self.getter()
+        self._prepare()
+
+    def _prepare(self):
+        # begin and end are fixed from here on: resample and align them once
+        self.prepared = True
+        self.plan = None
+
+        if len(self.begin_value) == 0 or len(self.end_value) == 0:
+            return
+
+        begin_array = np.asarray(self.begin_value, dtype=np.float64)
+        end_array = np.asarray(self.end_value, dtype=np.float64)
+        key = (self.alignment, begin_array.shape, begin_array.tobytes(), end_array.shape, end_array.tobytes())
+
+        plan = morph_plan_cache.get(key)
+        if plan is None:
+            begin_vertices = self.begin_value
+            end_vertices = self.end_value
+
+            max_vertices = max(len(begin_vertices), len(end_vertices))
+            begin_vertices = self.resample(begin_vertices, max_vertices)
+            end_vertices = self.resample(end_vertices, max_vertices)
+
+            if self.alignment == "exact":
+                best_shift = self.find_best_shift(begin_vertices, end_vertices)
+            else:
+                best_shift = self.find_best_shift_fft(begin_vertices, end_vertices)
+            begin_vertices = np.roll(begin_vertices, -best_shift, axis=0)
+
+            plan = (begin_vertices, end_vertices)
+            morph_plan_cache.put(key, plan)
+
+        self.plan = plan
             
     def resample(self, vertices, target_count):
-        if not vertices:
-            return [(0, 0)] * target_count
+        """
+            returns target_count points, evenly spaced along the closed border, as a (N,2) float32 array
+        """
+        if len(vertices) == 0:
+            return np.zeros((target_count, 2), dtype=np.float32)
+
+        vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
 
         if len(vertices) == target_count:
-            return vertices
-        
-        total_length = 0
-        distances = []
-        for i in range(0, len(vertices)):
-            dx = vertices[(i+1)%len(vertices)][0] - vertices[i][0]
-            dy = vertices[(i+1)%len(vertices)][1] - vertices[i][1]
-            d = math.sqrt(dx**2 + dy**2)
-            total_length += d
-            distances.append(d)
-
-        interval_length = total_length / (target_count - 1)
-
-        resampled = [vertices[0]]
-        i = 0
-        cumulative_length = interval_length
-
-        while len(resampled) < target_count:
-            if distances[i] <= cumulative_length:
-                resampled.append(vertices[i+1])
-                cumulative_length -= distances[i]
-                i = i + 1
-            else:
-                cumulative_length += interval_length
-                this = i
-                next = (i+1)%len(vertices)
-                if distances[i] == 0:
-                    fraction = 0.01
-                else:
-                    fraction = cumulative_length/distances[i]
+            return vertices.astype(np.float32)
 
-                x = (1-fraction)*vertices[this][0] + fraction*vertices[next][0]
-                y = (1-fraction)*vertices[this][1] + fraction*vertices[next][1]
-                resampled.append([x,y])
+        closed = np.vstack([vertices, vertices[:1]])
+        lengths = np.hypot(*np.diff(closed, axis=0).T)
+        cumulative = np.concatenate([[0.0], np.cumsum(lengths)])
+        total_length = cumulative[-1]
 
-        return resampled
+        if total_length == 0:
+            return np.repeat(vertices[:1], target_count, axis=0).astype(np.float32)
 
-    def blend_vertices(self, begin_vertices, end_vertices, fraction):
-        blended_vertices = []
-        for bv, ev in zip(begin_vertices, end_vertices):
-            blended_vertex = (
-                self.interpolate_value(bv[0], ev[0], fraction),
-                self.interpolate_value(bv[1], ev[1], fraction)
-            )
-            blended_vertices.append(blended_vertex)
-        return blended_vertices
+        # zero-length edges would give np.interp duplicate sample positions
+        keep = np.concatenate([[True], lengths > 0])
+        cumulative = cumulative[keep]
+        closed = closed[keep]
+
+        targets = np.arange(target_count) * (total_length / target_count)
+        resampled = np.empty((target_count, 2), dtype=np.float32)
+        resampled[:, 0] = np.interp(targets, cumulative, closed[:, 0])
+        resampled[:, 1] = np.interp(targets, cumulative, closed[:, 1])
 
-    def interpolate_value(self, start, end, fraction):
-        return (1 - fraction) * start + fraction * end
+        return resampled
 
     def find_best_shift(self, begin_vertices, end_vertices):
         min_total_distance = float('inf')
@@ -249,28 +452,120 @@ class kShapeMatcher:
                 best_shift = shift
         return best_shift
 
+    def _shift_distance(self, begin_vertices, end_vertices, shift):
+        total_distance = 0
+        for i in range(len(begin_vertices)):
+            bv = begin_vertices[(i + shift) % len(begin_vertices)]
+            ev = end_vertices[i]
+            total_distance += math.sqrt((bv[0] - ev[0]) ** 2 + (bv[1] - ev[1]) ** 2)
+        return total_distance
+
+    def find_best_shift_fft(self, begin_vertices, end_vertices):
+        """
+            the shift of find_best_shift in O(n log n): exact for up to 512 vertices and whenever the bound below
+            settles it, otherwise (only for more vertices) the best of the 256 most promising shifts
+        """
+        n = len(begin_vertices)
+        if n == 0:
+            return 0
+
+        begin = np.asarray(begin_vertices, dtype=np.float64)
+        end = np.asarray(end_vertices, dtype=np.float64)
+        b = begin[:, 0] + 1j * begin[:, 1]
+        e = end[:, 0] + 1j * end[:, 1]
+
+        # circular cross-correlation c[s] = sum_i b[i+s] * conj(e[i]) gives the summed
+        # squared distance of every shift in O(n log n)
+        correlation = np.fft.ifft(np.fft.fft(b) * np.conj(np.fft.fft(e))).real
+        squared_distances = np.sum(np.abs(b) ** 2) + np.sum(np.abs(e) ** 2) - 2 * correlation
+
+        # the squared metric only ranks shifts almost like the summed distance of find_best_shift, so
+        # candidates are rescored with the exact metric in the order of the squared metric. no vertex
+        # pair is further apart than the diagonal of both bounding boxes, so the summed distance of a
+        # shift is at least its summed squared distance divided by the diagonal (and at least its square
+        # root): once this bound exceeds the best exact distance, no other shift can win (or tie).
+        # detailed shapes stop after a budget of candidates, so the result may be approximate there
+        order = np.argsort(squared_distances, kind="stable")
+        both = np.concatenate((begin, end))
+        diagonal = float(np.hypot(*(both.max(axis=0) - both.min(axis=0))))
+        squared = np.maximum(squared_distances[order], 0)
+        lower_bounds = np.maximum(np.sqrt(squared), squared / diagonal if diagonal > 0 else 0)
+        budget = n if n <= 512 else 256
+        chunk = min(budget, max(16, 262144 // n))
+
+        shifts = []
+        distances = []
+        best_distance = float('inf')
+        start = 0
+        while start < n:
+            candidates = order[start:start + chunk]
+            indices = (np.arange(n)[None, :] + candidates[:, None]) % n
+            differences = begin[indices] - end[None, :, :]
+            candidate_distances = np.sqrt(np.sum(differences ** 2, axis=2)).sum(axis=1)
+            shifts.append(candidates)
+            distances.append(candidate_distances)
+            best_distance = min(best_distance, float(candidate_distances.min()))
+
+            start += chunk
+            tolerance = 1e-9 * max(1.0, best_distance)
+            if start >= budget or (start < n and lower_bounds[start] * (1 - 1e-9) > best_distance + tolerance):
+                break
+
+        shifts = np.concatenate(shifts)
+        distances = np.concatenate(distances)
+
+        # break (near) ties exactly like find_best_shift does
+        tolerance = 1e-9 * max(1.0, best_distance)
+        ties = sorted(shifts[distances <= best_distance + tolerance].tolist())
+
+        min_total_distance = float('inf')
+        best_shift = 0
+        for shift in ties:
+            total_distance = self._shift_distance(begin_vertices, end_vertices, shift)
+            if total_distance < min_total_distance:
+                min_total_distance = total_distance
+                best_shift = shift
+        return best_shift
+
     def interpolate(self, fraction):
-        begin_vertices = self.begin_value
-        end_vertices = self.end_value
-        
-        if not begin_vertices:
-            return end_vertices
-        if not end_vertices:
-            return begin_vertices
-        
-        max_vertices = max(len(begin_vertices), len(end_vertices))
-        begin_vertices = self.resample(begin_vertices, max_vertices)
-        end_vertices = self.resample(end_vertices, max_vertices)
-        
-        best_shift = self.find_best_shift(begin_vertices, end_vertices)
-        begin_vertices = begin_vertices[best_shift:] + begin_vertices[:best_shift]
-        
-        interpolated_vertices = self.blend_vertices(begin_vertices, end_vertices, fraction)
-        
+        if not self.prepared:
+            self._prepare()
+
+        if len(self.begin_value) == 0:
+            return self.end_value
+        if len(self.end_value) == 0:
+            return self.begin_value
+
+        begin_vertices, end_vertices = self.plan
+        interpolated_vertices = (1 - fraction) * begin_vertices + fraction * end_vertices
+
         return interpolated_vertices
 
+    def _morphOnGPU(self):
+        if self.shape is None or not self.shape._canMorphOnGPU():
+            self.deactivate()
+            return False
+
+        if not self.gpu:
+            if not self.prepared:
+                self._prepare()
+            if self.plan is None:
+                return False
+            self.morph = self.shape._beginMorph(*self.plan)
+            self.gpu = True
+
+        return True
+
+    def deactivate(self):
+        if self.gpu:
+            self.shape._endMorph(self.morph)
+            self.morph = None
+            self.gpu = False
+
     def process(self, the_time):
         if the_time >= self.end_time:
+            # only the final frame commits the end geometry to the shape
+            self.deactivate()
             value = self.interpolate(1)
             self.setter(value)
             return -1 
@@ -279,8 +574,11 @@ class kShapeMatcher:
             return 0
         
         fraction = (the_time - self.begin_time) / self.dt
-        value = self.interpolate(fraction)
-        self.setter(value)
+        if self._morphOnGPU():
+            self.shape._setMorphFraction(self.morph, fraction)
+        else:
+            value = self.interpolate(fraction)
+            self.setter(value)
         return 1
 
 class kLoop:
@@ -360,21 +658,82 @@ class kSetter:
 
 class kActionQueue:
     def __init__(self):
-        self.queue = []
+        self.pending = []  # heap of (begin_time, number, action)
+        self.active = []  # list of (number, action), sorted by number
+        self.counter = itertools.count()
+        self.horizon = 0
+        self.batch = []  # the entries of the tick, which is being processed
+        self.removed = set()  # numbers of the entries in batch, which were removed during the tick
 
     def add(self, action):
-        self.queue.append(action)
+        end_time = getattr(action, "end_time", action.begin_time)
+        if end_time > self.horizon:
+            self.horizon = end_time
+
+        heapq.heappush(self.pending, (action.begin_time, next(self.counter), action))
         kstore.milliseconds += kstore.delay
-    
+
+    def getHorizon(self):
+        """
+            returns the time (in ms) at which the last queued action is finished
+        """
+        return self.horizon
+
+    def remove(self, condition):
+        """
+            removes all pending and active actions for which condition(action) is True
+        """
+        self.pending = [entry for entry in self.pending if not condition(entry[2])]
+        heapq.heapify(self.pending)
+
+        # removed while processing (e.g. removeOnTick inside the tick function): skip them for the rest of the tick
+        for entry in self.batch:
+            if entry[0] not in self.removed and condition(entry[1]):
+                self.removed.add(entry[0])
+                if hasattr(entry[1], "deactivate"):
+                    entry[1].deactivate()
+
+        active = []
+        for entry in self.active:
+            if entry[0] in self.removed:
+                continue
+            if not condition(entry[1]):
+                active.append(entry)
+            elif hasattr(entry[1], "deactivate"):
+                entry[1].deactivate()
+        self.active = active
+
+    def _activate(self, the_time):
+        due = []
+        while self.pending and self.pending[0][0] <= the_time:
+            _, number, action = heapq.heappop(self.pending)
+            if hasattr(action, "activate"):
+                action.activate()
+            due.append((number, action))
+        return due
+
     def process(self):
-        i = 0
         the_time = kstore.elapsed_timer.elapsed()
-        while i < len(self.queue):
-            action = self.queue[i]
-            if action.process(the_time) == -1:
-                self.queue.pop(i)
-            else:
-                i = i + 1
+
+        # actions run in the order they were added, just like a single list
+        batch = self.active + self._activate(the_time)
+        batch.sort(key=lambda entry: entry[0])
+        self.active = []
+
+        interpolation_engine.evaluate(the_time)
+
+        # actions added while processing (e.g. inside onTick) run in the same tick
+        while batch:
+            self.batch = batch
+            for entry in batch:
+                if entry[0] in self.removed:
+                    continue
+                if entry[1].process(the_time) != -1 and entry[0] not in self.removed:
+                    self.active.append(entry)
+            batch = self._activate(the_time)
+
+        self.batch = []
+        self.removed.clear()
 
 action_queue = kActionQueue()
 # ==================================== HELPER CLASSES ===========================================
@@ -409,6 +768,10 @@ class kStore:
         self.grid = None 
         self.pendown = False 
         self.color_mixing = "subtractive"
+        self.renderer = "batch"
+        self.stencil_threshold = 256
+        self.text_mode = "bitmap"
+        self.mouse_move_mode = "immediate"
 
     def setPos(self, *point):
         new_pos = toFloatList(point)
@@ -541,6 +904,134 @@ class kStore:
 
 kstore = kStore()
 
+class kLRUCache:
+    """
+        a dictionary with a maximum size, that evicts the least recently used entries first
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        return default
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def getStats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries), "max_size": self.max_size}
+
+    def __len__(self):
+        return len(self.entries)
+
+morph_plan_cache = kLRUCache(64)
+
+class kGeometryCache:
+    """
+        vertices of ellipses, arcs and rounded rects, shared by all shapes
+
+        - unit tables (cos/sin of the segment angles) are cached by segment count (and opening angle)
+        - the finished vertices are cached by the shape parameters, rounded to 1/1000 pixel
+    """
+    def __init__(self, max_tables=256, max_vertices=2048):
+        self.tables = kLRUCache(max_tables)
+        self.vertices = kLRUCache(max_vertices)
+
+    def _quantize(self, value):
+        return round(value * 1000)
+
+    def _table(self, key, build):
+        table = self.tables.get(key)
+        if table is None:
+            table = build()
+            table.flags.writeable = False
+            self.tables.put(key, table)
+        return table
+
+    def _vertices(self, key, build):
+        vertices = self.vertices.get(key)
+        if vertices is None:
+            vertices = build()
+            vertices = vertices.astype(np.float32)
+            vertices.flags.writeable = False
+            self.vertices.put(key, vertices)
+        return vertices
+
+    def unitCircle(self, num_segments):
+        def build():
+            theta = 2.0 * np.pi * np.arange(num_segments) / num_segments
+            return np.stack([np.cos(theta), np.sin(theta)], axis=1)
+        return self._table(("circle", num_segments), build)
+
+    def unitArc(self, num_segments, angle):
+        def build():
+            theta = angle/180*np.pi / num_segments * np.arange(num_segments + 1)
+            return np.stack([np.cos(theta), np.sin(theta)], axis=1)
+        return self._table(("arc", num_segments, angle), build)
+
+    def unitCorners(self, num_segments):
+        def build():
+            start = np.array([np.pi, 1.5 * np.pi, 0, 0.5 * np.pi])
+            theta = start[:, None] + 0.5 * np.pi * np.arange(num_segments + 1) / num_segments
+            return np.stack([np.cos(theta), np.sin(theta)], axis=2)
+        return self._table(("corners", num_segments), build)
+
+    def ellipse(self, a, b, num_segments):
+        a, b = self._quantize(a), self._quantize(b)
+        return self._vertices(("ellipse", num_segments, a, b), lambda: self.unitCircle(num_segments) * [a/1000, b/1000])
+
+    def arc(self, radius, angle, num_segments):
+        radius, angle = self._quantize(radius), self._quantize(angle)
+
+        def build():
+            vertices = np.zeros((num_segments + 2, 2))
+            vertices[1:] = self.unitArc(num_segments, angle/1000) * (radius/1000)
+            return vertices
+        return self._vertices(("arc", num_segments, radius, angle), build)
+
+    def roundedRect(self, width, height, radius, num_segments):
+        width, height, radius = self._quantize(width), self._quantize(height), self._quantize(radius)
+
+        def build():
+            half_width, half_height, r = width/2000, height/2000, radius/1000
+            centers = np.array([
+                [r - half_width, r - half_height],
+                [half_width - r, r - half_height],
+                [half_width - r, half_height - r],
+                [r - half_width, half_height - r],
+            ])
+            edges = np.array([
+                [half_width - r, -half_height],
+                [half_width, half_height - r],
+                [r - half_width, half_height],
+                [-half_width, r - half_height],
+            ])
+            corners = centers[:, None, :] + r * self.unitCorners(num_segments)
+            return np.concatenate([corners, edges[:, None, :]], axis=1).reshape(-1, 2)
+        return self._vertices(("rounded_rect", num_segments, width, height, radius), build)
+
+    def getStats(self):
+        return {"tables": self.tables.getStats(), "vertices": self.vertices.getStats()}
+
+    def clear(self):
+        self.tables.clear()
+        self.vertices.clear()
+
+geometry_cache = kGeometryCache()
+
 def printErrorGL(message = ""):
     err = glGetError()
     if err:
@@ -550,70 +1041,371 @@ def printErrorGL(message = ""):
 
 
 
-def is_convex(p1, p2, p3):
-    """Check if the angle formed by p1->p2->p3 is convex (counter-clockwise)."""
-    return (p2[0] - p1[0]) * (p3[1] - p1[1]) - (p2[1] - p1[1]) * (p3[0] - p1[0]) > 0
-
-def point_in_triangle(pt, tri):
-    """Check if a point is inside a triangle using barycentric coordinates."""
-    def sign(p1, p2, p3):
-        return (p1[0] - p3[0]) * (p2[1] - p3[1]) - (p2[0] - p3[0]) * (p1[1] - p3[1])
-    
-    b1 = sign(pt, tri[0], tri[1]) < 0.0
-    b2 = sign(pt, tri[1], tri[2]) < 0.0
-    b3 = sign(pt, tri[2], tri[0]) < 0.0
+class kPolygonNode:
+    __slots__ = ("i", "x", "y", "prev", "next", "z", "prev_z", "next_z")
 
-    return b1 == b2 == b3
+    def __init__(self, i, x, y):
+        self.i = i
+        self.x = x
+        self.y = y
+        self.prev = None
+        self.next = None
+        self.z = 0
+        self.prev_z = None
+        self.next_z = None
 
+class kTriangulator:
+    """
+        ear clipping on a linked list of vertices (the "earcut" algorithm)
 
-def ensure_ccw(vertices):
-    area = 0
-    for i in range(len(vertices)):
-        x1, y1 = vertices[i]
-        x2, y2 = vertices[(i + 1) % len(vertices)]
-        area += (x2 - x1) * (y2 + y1)
-    if area > 0:  # If clockwise, reverse
-        vertices.reverse()
-    return vertices
+        - polygons with more than 80 vertices are indexed along a z-order curve, so an ear is only tested against nearby vertices
+        - duplicate and collinear vertices are filtered, small self-intersections are cured and
+          polygons without ears are split along a diagonal, instead of giving up
+    """
+    def triangulate(self, vertices):
+        """
+            returns the triangles as a flat list of indices into vertices
+        """
+        triangles = []
+        last = self._linkedList(vertices)
+        if last is None or last.next is last.prev:
+            return triangles
 
-def tessellate(outer_contour):
-    if len(outer_contour) < 3:
-        return []
+        min_x = min_y = inv_size = 0
+        if len(vertices) > 80:
+            xs = [vertex[0] for vertex in vertices]
+            ys = [vertex[1] for vertex in vertices]
+            min_x, min_y = min(xs), min(ys)
+            inv_size = max(max(xs) - min_x, max(ys) - min_y)
+            inv_size = 32767 / inv_size if inv_size != 0 else 0
 
-    vertices = ensure_ccw(outer_contour[:])
-    triangles = []
+        self._earcutLinked(last, triangles, min_x, min_y, inv_size, 0)
+        return triangles
 
-    while len(vertices) > 3:
-        ear_found = False
+    def _linkedList(self, vertices):
+        signed_area = 0
+        j = len(vertices) - 1
         for i in range(len(vertices)):
-            prev = vertices[i - 1]
-            curr = vertices[i]
-            next = vertices[(i + 1) % len(vertices)]
-
-            if is_convex(prev, curr, next):
-                triangle = [prev, curr, next]
-                is_ear = True
-                for p in vertices:
-                    if p not in triangle and point_in_triangle(p, triangle):
-                        is_ear = False
-                        break
-                if is_ear:
-                    triangles.append(triangle)
-                    del vertices[i]
-                    ear_found = True
+            signed_area += (vertices[j][0] - vertices[i][0]) * (vertices[i][1] + vertices[j][1])
+            j = i
+
+        indices = range(len(vertices)) if signed_area > 0 else range(len(vertices) - 1, -1, -1)
+        last = None
+        for i in indices:
+            last = self._insertNode(i, vertices[i][0], vertices[i][1], last)
+
+        if last is not None and self._equals(last, last.next):
+            self._removeNode(last)
+            last = last.next
+        return last
+
+    def _earcutLinked(self, ear, triangles, min_x, min_y, inv_size, attempt):
+        if ear is None:
+            return
+
+        if attempt == 0 and inv_size:
+            self._indexCurve(ear, min_x, min_y, inv_size)
+
+        stop = ear
+        while ear.prev is not ear.next:
+            prev = ear.prev
+            next = ear.next
+
+            if self._isEarHashed(ear, min_x, min_y, inv_size) if inv_size else self._isEar(ear):
+                triangles.extend((prev.i, ear.i, next.i))
+                self._removeNode(ear)
+                # skipping the next vertex leads to less sliver triangles
+                ear = next.next
+                stop = next.next
+                continue
+
+            ear = next
+            if ear is stop:
+                # no ears left: filter degenerate vertices, then cure self-intersections, then split the polygon
+                if attempt == 0:
+                    self._earcutLinked(self._filterPoints(ear), triangles, min_x, min_y, inv_size, 1)
+                elif attempt == 1:
+                    ear = self._cureLocalIntersections(self._filterPoints(ear), triangles)
+                    self._earcutLinked(ear, triangles, min_x, min_y, inv_size, 2)
+                elif attempt == 2:
+                    self._splitEarcut(ear, triangles, min_x, min_y, inv_size)
+                break
+
+    def _isEar(self, ear):
+        a, b, c = ear.prev, ear, ear.next
+        if self._area(a, b, c) >= 0:
+            return False
+
+        x0, x1 = min(a.x, b.x, c.x), max(a.x, b.x, c.x)
+        y0, y1 = min(a.y, b.y, c.y), max(a.y, b.y, c.y)
+
+        p = c.next
+        while p is not a:
+            if x0 <= p.x <= x1 and y0 <= p.y <= y1 and self._pointInTriangle(a, b, c, p) and self._area(p.prev, p, p.next) >= 0:
+                return False
+            p = p.next
+        return True
+
+    def _isEarHashed(self, ear, min_x, min_y, inv_size):
+        a, b, c = ear.prev, ear, ear.next
+        if self._area(a, b, c) >= 0:
+            return False
+
+        x0, x1 = min(a.x, b.x, c.x), max(a.x, b.x, c.x)
+        y0, y1 = min(a.y, b.y, c.y), max(a.y, b.y, c.y)
+        min_z = self._zOrder(x0, y0, min_x, min_y, inv_size)
+        max_z = self._zOrder(x1, y1, min_x, min_y, inv_size)
+
+        def blocks(p):
+            return p is not a and p is not c and x0 <= p.x <= x1 and y0 <= p.y <= y1 \
+                and self._pointInTriangle(a, b, c, p) and self._area(p.prev, p, p.next) >= 0
+
+        # only vertices within the z-order range of the triangle's bounding box can be inside of it
+        p = ear.prev_z
+        n = ear.next_z
+        while p is not None and p.z >= min_z and n is not None and n.z <= max_z:
+            if blocks(p) or blocks(n):
+                return False
+            p = p.prev_z
+            n = n.next_z
+
+        while p is not None and p.z >= min_z:
+            if blocks(p):
+                return False
+            p = p.prev_z
+
+        while n is not None and n.z <= max_z:
+            if blocks(n):
+                return False
+            n = n.next_z
+
+        return True
+
+    def _cureLocalIntersections(self, start, triangles):
+        p = start
+        while True:
+            a = p.prev
+            b = p.next.next
+            if not self._equals(a, b) and self._intersects(a, p, p.next, b) and self._locallyInside(a, b) and self._locallyInside(b, a):
+                triangles.extend((a.i, p.i, b.i))
+                self._removeNode(p)
+                self._removeNode(p.next)
+                p = start = b
+            p = p.next
+            if p is start:
+                break
+        return self._filterPoints(p)
+
+    def _splitEarcut(self, start, triangles, min_x, min_y, inv_size):
+        a = start
+        while True:
+            b = a.next.next
+            while b is not a.prev:
+                if a.i != b.i and self._isValidDiagonal(a, b):
+                    c = self._splitPolygon(a, b)
+                    a = self._filterPoints(a, a.next)
+                    c = self._filterPoints(c, c.next)
+                    self._earcutLinked(a, triangles, min_x, min_y, inv_size, 0)
+                    self._earcutLinked(c, triangles, min_x, min_y, inv_size, 0)
+                    return
+                b = b.next
+            a = a.next
+            if a is start:
+                return
+
+    def _filterPoints(self, start, end=None):
+        if start is None:
+            return start
+        if end is None:
+            end = start
+
+        p = start
+        while True:
+            again = False
+            if self._equals(p, p.next) or self._area(p.prev, p, p.next) == 0:
+                self._removeNode(p)
+                p = end = p.prev
+                if p is p.next:
                     break
-        if not ear_found:
-            # Fallback: break to avoid infinite loop
-            break
+                again = True
+            else:
+                p = p.next
+            if not again and p is end:
+                break
+        return end
+
+    def _indexCurve(self, start, min_x, min_y, inv_size):
+        nodes = []
+        p = start
+        while True:
+            if p.z == 0:
+                p.z = self._zOrder(p.x, p.y, min_x, min_y, inv_size)
+            nodes.append(p)
+            p = p.next
+            if p is start:
+                break
+
+        nodes.sort(key=lambda node: node.z)
+        previous = None
+        for node in nodes:
+            node.prev_z = previous
+            if previous is not None:
+                previous.next_z = node
+            previous = node
+        previous.next_z = None
+
+    def _zOrder(self, x, y, min_x, min_y, inv_size):
+        x = int((x - min_x) * inv_size)
+        y = int((y - min_y) * inv_size)
+
+        x = (x | (x << 8)) & 0x00FF00FF
+        x = (x | (x << 4)) & 0x0F0F0F0F
+        x = (x | (x << 2)) & 0x33333333
+        x = (x | (x << 1)) & 0x55555555
+
+        y = (y | (y << 8)) & 0x00FF00FF
+        y = (y | (y << 4)) & 0x0F0F0F0F
+        y = (y | (y << 2)) & 0x33333333
+        y = (y | (y << 1)) & 0x55555555
+
+        return x | (y << 1)
+
+    def _pointInTriangle(self, a, b, c, p):
+        return (c.x - p.x) * (a.y - p.y) >= (a.x - p.x) * (c.y - p.y) \
+            and (a.x - p.x) * (b.y - p.y) >= (b.x - p.x) * (a.y - p.y) \
+            and (b.x - p.x) * (c.y - p.y) >= (c.x - p.x) * (b.y - p.y)
+
+    def _isValidDiagonal(self, a, b):
+        return a.next.i != b.i and a.prev.i != b.i and not self._intersectsPolygon(a, b) and (
+            self._locallyInside(a, b) and self._locallyInside(b, a) and self._middleInside(a, b)
+            and (self._area(a.prev, a, b.prev) != 0 or self._area(a, b.prev, b) != 0)
+            or self._equals(a, b) and self._area(a.prev, a, a.next) > 0 and self._area(b.prev, b, b.next) > 0
+        )
+
+    def _area(self, p, q, r):
+        return (q.y - p.y) * (r.x - q.x) - (q.x - p.x) * (r.y - q.y)
+
+    def _equals(self, p, q):
+        return p.x == q.x and p.y == q.y
+
+    def _sign(self, value):
+        return (value > 0) - (value < 0)
+
+    def _onSegment(self, p, q, r):
+        return min(p.x, r.x) <= q.x <= max(p.x, r.x) and min(p.y, r.y) <= q.y <= max(p.y, r.y)
+
+    def _intersects(self, p1, q1, p2, q2):
+        o1 = self._sign(self._area(p1, q1, p2))
+        o2 = self._sign(self._area(p1, q1, q2))
+        o3 = self._sign(self._area(p2, q2, p1))
+        o4 = self._sign(self._area(p2, q2, q1))
+
+        if o1 != o2 and o3 != o4:
+            return True
+        # collinear cases
+        if o1 == 0 and self._onSegment(p1, p2, q1):
+            return True
+        if o2 == 0 and self._onSegment(p1, q2, q1):
+            return True
+        if o3 == 0 and self._onSegment(p2, p1, q2):
+            return True
+        if o4 == 0 and self._onSegment(p2, q1, q2):
+            return True
+        return False
 
-    if len(vertices) == 3:
-        triangles.append(vertices)
-    
-    flat_list = [coord for triangle in triangles for coord in triangle]
+    def _intersectsPolygon(self, a, b):
+        p = a
+        while True:
+            if p.i != a.i and p.next.i != a.i and p.i != b.i and p.next.i != b.i and self._intersects(p, p.next, a, b):
+                return True
+            p = p.next
+            if p is a:
+                return False
+
+    def _locallyInside(self, a, b):
+        if self._area(a.prev, a, a.next) < 0:
+            return self._area(a, b, a.next) >= 0 and self._area(a, a.prev, b) >= 0
+        return self._area(a, b, a.prev) < 0 or self._area(a, a.next, b) < 0
+
+    def _middleInside(self, a, b):
+        p = a
+        inside = False
+        px = (a.x + b.x) / 2
+        py = (a.y + b.y) / 2
+        while True:
+            if (p.y > py) != (p.next.y > py) and p.next.y != p.y and px < (p.next.x - p.x) * (py - p.y) / (p.next.y - p.y) + p.x:
+                inside = not inside
+            p = p.next
+            if p is a:
+                return inside
+
+    def _splitPolygon(self, a, b):
+        a2 = kPolygonNode(a.i, a.x, a.y)
+        b2 = kPolygonNode(b.i, b.x, b.y)
+        an = a.next
+        bp = b.prev
+
+        a.next = b
+        b.prev = a
+        a2.next = an
+        an.prev = a2
+        b2.next = a2
+        a2.prev = b2
+        bp.next = b2
+        b2.prev = bp
+
+        return b2
+
+    def _insertNode(self, i, x, y, last):
+        p = kPolygonNode(i, x, y)
+        if last is None:
+            p.prev = p
+            p.next = p
+        else:
+            p.next = last.next
+            p.prev = last
+            last.next.prev = p
+            last.next = p
+        return p
+
+    def _removeNode(self, p):
+        p.next.prev = p.prev
+        p.prev.next = p.next
+        if p.prev_z is not None:
+            p.prev_z.next_z = p.next_z
+        if p.next_z is not None:
+            p.next_z.prev_z = p.prev_z
+
+triangulator = kTriangulator()
+triangulation_cache = kLRUCache(256)
+
+def triangulate(outer_contour):
+    """
+        returns the triangles of the polygon as a read-only int32 index array (three indices per triangle)
+
+        results are cached by the content of the contour, so an unchanged contour is never triangulated twice
+    """
+    vertices = np.ascontiguousarray(outer_contour, dtype=np.float32).reshape(-1, 2)
+    if len(vertices) < 3:
+        return np.zeros(0, dtype=np.int32)
+
+    key = hashlib.blake2b(vertices.tobytes(), digest_size=16).digest()
+    indices = triangulation_cache.get(key)
+    if indices is None:
+        indices = np.array(triangulator.triangulate(vertices.tolist()), dtype=np.int32)
+        indices.flags.writeable = False
+        triangulation_cache.put(key, indices)
 
-    return flat_list
+    return indices
+
+def tessellate(outer_contour):
+    """
+        returns the triangles of the polygon as a (3*N,2) array of corner points
+    """
+    vertices = np.asarray(outer_contour, dtype=np.float32).reshape(-1, 2)
+    return vertices[triangulate(vertices)]
     
-def kNumber(instance, name, initial_value, update=True):
+def kNumber(instance, name, initial_value, update=True, draw="_draw"):
     cast = float
     initial_value = cast(initial_value)
 
@@ -633,7 +1425,7 @@ def kNumber(instance, name, initial_value, update=True):
         setattr(instance, private_name, cast(value))
         if update:
             instance._updateShape()
-        instance._draw()
+        getattr(instance, draw)()
 
     def public_getter():
         return getattr(instance, name, initial_value)
@@ -668,7 +1460,7 @@ def kString(instance, name, initial_value, update=True):
     
     return [new_public_getter, new_public_setter]
 
-def kValue(instance, name, initial_value, update=True):
+def kValue(instance, name, initial_value, update=True, draw="_draw"):
     name = name
     private_name = f"_{name}"
     capitalized_name = name[0].upper() + name[1:]
@@ -685,7 +1477,7 @@ def kValue(instance, name, initial_value, update=True):
         setattr(instance, private_name, value)
         if update:
             instance._updateShape()
-        instance._draw()
+        getattr(instance, draw)()
 
     def public_getter():
         return getattr(instance, name, initial_value)
@@ -709,7 +1501,7 @@ def kValue(instance, name, initial_value, update=True):
 
     return (public_getter, public_setter)
 
-def kVec2(instance, name, *initial_value, update=True):
+def kVec2(instance, name, *initial_value, update=True, draw="_draw"):
     cast = float 
 
     name = name
@@ -730,7 +1522,7 @@ def kVec2(instance, name, *initial_value, update=True):
         setattr(instance, private_name, toFloatList(value))
         if update:
             instance._updateShape()
-        instance._draw()
+        getattr(instance, draw)()
 
     def public_getter():
         return getattr(instance, name, initial_value)
@@ -846,7 +1638,7 @@ def kVecN(instance, name, *initial_value, update=True):
 
     return (public_getter, public_setter)
 
-def kColor(instance, name, *args, update=True):
+def kColor(instance, name, *args, update=True, draw="_draw"):
     name = name
     private_name = f"_{name}"
     capitalized_name = name[0].upper() + name[1:]
@@ -868,7 +1660,7 @@ def kColor(instance, name, *args, update=True):
         setattr(instance, private_name, toColor(value))
         if update:
             instance._updateShape()
-        instance._draw()
+        getattr(instance, draw)()
 
     def public_getter():
         return getattr(instance, name, initial_value_public)
@@ -1020,90 +1812,124 @@ class kRainbow:
     def reset(self):
         self.i = 0
     
+# LaTeX symbols, subscripts and superscripts, which replaceLatex turns into their Unicode counterparts
+LATEX_TO_UNICODE = {
+    r'\\alpha': 'α',
+    r'\\beta': 'β',
+    r'\\gamma': 'γ',
+    r'\\delta': 'δ',
+    r'\\epsilon': 'ε',
+    r'\\zeta': 'ζ',
+    r'\\eta': 'η',
+    r'\\theta': 'θ',
+    r'\\iota': 'ι',
+    r'\\kappa': 'κ',
+    r'\\lambda': 'λ',
+    r'\\mu': 'μ',
+    r'\\nu': 'ν',
+    r'\\xi': 'ξ',
+    r'\\omicron': 'ο',
+    r'\\pi': 'π',
+    r'\\rho': 'ρ',
+    r'\\sigma': 'σ',
+    r'\\tau': 'τ',
+    r'\\upsilon': 'υ',
+    r'\\phi': 'φ',
+    r'\\chi': 'χ',
+    r'\\psi': 'ψ',
+    r'\\omega': 'ω',
+    r'\\Alpha': 'Α',
+    r'\\Beta': 'Β',
+    r'\\Gamma': 'Γ',
+    r'\\Delta': 'Δ',
+    r'\\Epsilon': 'Ε',
+    r'\\Zeta': 'Ζ',
+    r'\\Eta': 'Η',
+    r'\\Theta': 'Θ',
+    r'\\Iota': 'Ι',
+    r'\\Kappa': 'Κ',
+    r'\\Lambda': 'Λ',
+    r'\\Mu': 'Μ',
+    r'\\Nu': 'Ν',
+    r'\\Xi': 'Ξ',
+    r'\\Omicron': 'Ο',
+    r'\\Pi': 'Π',
+    r'\\Rho': 'Ρ',
+    r'\\Sigma': 'Σ',
+    r'\\Tau': 'Τ',
+    r'\\Upsilon': 'Υ',
+    r'\\Phi': 'Φ',
+    r'\\Chi': 'Χ',
+    r'\\Psi': 'Ψ',
+    r'\\Omega': 'Ω',
+    r'\\deg': '°',
+    r'\\cdot': '·',
+}
+
+LATEX_SUBSCRIPTS = {
+    '_a': 'ₐ', '_b': 'b', '_c': 'ᶜ', '_d': 'ᵈ', '_f': 'ᶠ', '_g': 'ᵍ', '_e': 'ₑ', '_h': 'ₕ', '_i': 'ᵢ', '_j': 'ⱼ', '_k': 'ₖ', '_l': 'ₗ', '_m': 'ₘ', '_n': 'ₙ', '_o': 'ₒ', '_p': 'ₚ', '_r': 'ᵣ', 
+    '_s': 'ₛ', '_t': 'ₜ', '_u': 'ᵤ', '_v': 'ᵥ', '_x': 'ₓ', '_y': 'ᵧ', '_z': 'ᶻ', 
+    '_0': '₀', '_1': '₁', '_2': '₂', '_3': '₃', '_4': '₄', '_5': '₅', 
+    '_6': '₆', '_7': '₇', '_8': '₈', '_9': '₉'
+}
+
+LATEX_SUPERSCRIPTS = {
+    '^a': 'ᵃ', '^b': 'ᵇ', '^c': 'ᶜ', '^d': 'ᵈ', '^e': 'ᵉ', '^f': 'ᶠ', 
+    '^g': 'ᵍ', '^h': 'ʰ', '^i': 'ⁱ', '^j': 'ʲ', '^k': 'ᵏ', '^l': 'ˡ', 
+    '^m': 'ᵐ', '^n': 'ⁿ', '^o': 'ᵒ', '^p': 'ᵖ', '^q': 'q', '^r': 'ʳ', '^s': 'ˢ', 
+    '^t': 'ᵗ', '^u': 'ᵘ', '^v': 'ᵛ', '^w': 'ʷ', '^x': 'ˣ', '^y': 'ʸ', '^z': 'ᶻ',
+    '^0': '⁰', '^1': '¹', '^2': '²', '^3': '³', '^4': '⁴', '^5': '⁵', 
+    '^6': '⁶', '^7': '⁷', '^8': '⁸', '^9': '⁹'
+}
+
+def _compileLatex():
+    # the symbols were replaced first, then the subscripts, then the superscripts: none of them overlap,
+    # only "^_b" became "^b" and then a superscript b
+    table = dict(LATEX_TO_UNICODE)
+    table.update(LATEX_SUBSCRIPTS)
+    table.update(LATEX_SUPERSCRIPTS)
+    table["^_b"] = LATEX_SUPERSCRIPTS["^b"]
+    tokens = sorted(table, key=len, reverse=True)
+    return re.compile("|".join(re.escape(token) for token in tokens)), table
+
+latex_pattern, latex_table = _compileLatex()
+latex_cache = kLRUCache(1024)
+
 def replaceLatex(text):
+    """
+        returns the text with LaTeX symbols (like \\\\alpha), subscripts (_1) and superscripts (^2) as Unicode characters
+
+        - all tokens are replaced in a single pass, the results of the last 1024 texts are kept
+    """
     text = str(text)
-    latex_to_unicode = {
-        r'\\alpha': 'α',
-        r'\\beta': 'β',
-        r'\\gamma': 'γ',
-        r'\\delta': 'δ',
-        r'\\epsilon': 'ε',
-        r'\\zeta': 'ζ',
-        r'\\eta': 'η',
-        r'\\theta': 'θ',
-        r'\\iota': 'ι',
-        r'\\kappa': 'κ',
-        r'\\lambda': 'λ',
-        r'\\mu': 'μ',
-        r'\\nu': 'ν',
-        r'\\xi': 'ξ',
-        r'\\omicron': 'ο',
-        r'\\pi': 'π',
-        r'\\rho': 'ρ',
-        r'\\sigma': 'σ',
-        r'\\tau': 'τ',
-        r'\\upsilon': 'υ',
-        r'\\phi': 'φ',
-        r'\\chi': 'χ',
-        r'\\psi': 'ψ',
-        r'\\omega': 'ω',
-        r'\\Alpha': 'Α',
-        r'\\Beta': 'Β',
-        r'\\Gamma': 'Γ',
-        r'\\Delta': 'Δ',
-        r'\\Epsilon': 'Ε',
-        r'\\Zeta': 'Ζ',
-        r'\\Eta': 'Η',
-        r'\\Theta': 'Θ',
-        r'\\Iota': 'Ι',
-        r'\\Kappa': 'Κ',
-        r'\\Lambda': 'Λ',
-        r'\\Mu': 'Μ',
-        r'\\Nu': 'Ν',
-        r'\\Xi': 'Ξ',
-        r'\\Omicron': 'Ο',
-        r'\\Pi': 'Π',
-        r'\\Rho': 'Ρ',
-        r'\\Sigma': 'Σ',
-        r'\\Tau': 'Τ',
-        r'\\Upsilon': 'Υ',
-        r'\\Phi': 'Φ',
-        r'\\Chi': 'Χ',
-        r'\\Psi': 'Ψ',
-        r'\\Omega': 'Ω',
-        r'\\deg': '°',
-        r'\\cdot': '·',
-    }
-    
-    # Replace LaTeX symbols with Unicode counterparts
-    for latex_symbol, unicode_symbol in latex_to_unicode.items():
-        text = text.replace(latex_symbol, unicode_symbol)
-    
-    # Replace underscores followed by a character with its Unicode subscript counterpart
-    subscript_map = {
-        '_a': 'ₐ', '_b': 'b', '_c': 'ᶜ', '_d': 'ᵈ', '_f': 'ᶠ', '_g': 'ᵍ', '_e': 'ₑ', '_h': 'ₕ', '_i': 'ᵢ', '_j': 'ⱼ', '_k': 'ₖ', '_l': 'ₗ', '_m': 'ₘ', '_n': 'ₙ', '_o': 'ₒ', '_p': 'ₚ', '_r': 'ᵣ', 
-        '_s': 'ₛ', '_t': 'ₜ', '_u': 'ᵤ', '_v': 'ᵥ', '_x': 'ₓ', '_y': 'ᵧ', '_z': 'ᶻ', 
-        '_0': '₀', '_1': '₁', '_2': '₂', '_3': '₃', '_4': '₄', '_5': '₅', 
-        '_6': '₆', '_7': '₇', '_8': '₈', '_9': '₉'
-    }
-    
-    for subscript, unicode_subscript in subscript_map.items():
-        text = text.replace(subscript, unicode_subscript)
-    
-    # Replace ^ followed by a character with its Unicode superscript counterpart
-    superscript_map = {
-        '^a': 'ᵃ', '^b': 'ᵇ', '^c': 'ᶜ', '^d': 'ᵈ', '^e': 'ᵉ', '^f': 'ᶠ', 
-        '^g': 'ᵍ', '^h': 'ʰ', '^i': 'ⁱ', '^j': 'ʲ', '^k': 'ᵏ', '^l': 'ˡ', 
-        '^m': 'ᵐ', '^n': 'ⁿ', '^o': 'ᵒ', '^p': 'ᵖ', '^q': 'q', '^r': 'ʳ', '^s': 'ˢ', 
-        '^t': 'ᵗ', '^u': 'ᵘ', '^v': 'ᵛ', '^w': 'ʷ', '^x': 'ˣ', '^y': 'ʸ', '^z': 'ᶻ',
-        '^0': '⁰', '^1': '¹', '^2': '²', '^3': '³', '^4': '⁴', '^5': '⁵', 
-        '^6': '⁶', '^7': '⁷', '^8': '⁸', '^9': '⁹'
-    }
-    
-    for superscript, unicode_superscript in superscript_map.items():
-        text = text.replace(superscript, unicode_superscript)
+    if "\\" not in text and "_" not in text and "^" not in text:
+        return text
+
+    result = latex_cache.get(text)
+    if result is None:
+        result = latex_pattern.sub(lambda match: latex_table[match.group()], text)
+        latex_cache.put(text, result)
+    return result
+
+def toVertexArray(vertices):
+    """
+        returns the vertices as a read-only, contiguous (N,2) float32 array
+
+        read-only float32 arrays are returned as they are (no copy), everything else is copied
+    """
+    if isinstance(vertices, np.ndarray) and vertices.dtype == np.float32 and not vertices.flags.writeable \
+            and vertices.flags.c_contiguous and vertices.ndim == 2 and vertices.shape[1] == 2:
+        return vertices
 
-    return text    
+    array = np.array(vertices, dtype=np.float32).reshape(-1, 2)
+    array.flags.writeable = False
+    return array
+
+def toPointArray(points):
+    """
+        returns the points as a (N,2) float64 array (a single point can be given as [x, y])
+    """
+    return np.asarray(points, dtype=np.float64).reshape(-1, 2)
 
 def toFloatList(args):
     cast = float
@@ -1156,8 +1982,114 @@ def toColor(args):
 
 shape_buffer = []
 
+class kHitGrid:
+    """
+        a uniform grid of the world boxes of all shapes with mouse handlers, so that the window
+        only tests the shapes under the mouse with contains() instead of every shape
+
+        - moving or changing a shape only marks it (touch), its cells are updated on the next query
+        - shapes, which cover too many cells or have no box (see kShape._localBounds), are candidates everywhere
+    """
+    def __init__(self, cell_size=64, max_cells=256):
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self.cells = {}  # {(column, row): set of shapes}
+        self.shape_cells = {}  # {shape: list of its cells, None for shapes, which are candidates everywhere}
+        self.everywhere = set()
+        self.shapes = set()  # all shapes in shape_buffer
+        self.dirty = set()
+        self.queries = 0
+        self.candidates = 0
+
+    def add(self, shape):
+        self.shapes.add(shape)
+        self.dirty.add(shape)
+
+    def remove(self, shape):
+        self.shapes.discard(shape)
+        self.dirty.discard(shape)
+        self._unlink(shape)
+
+    def touch(self, shape):
+        if shape in self.shapes:
+            self.dirty.add(shape)
+
+    def _unlink(self, shape):
+        if shape not in self.shape_cells:
+            return
+        cells = self.shape_cells.pop(shape)
+        if cells is None:
+            self.everywhere.discard(shape)
+            return
+        for cell in cells:
+            members = self.cells[cell]
+            members.discard(shape)
+            if not members:
+                del self.cells[cell]
+
+    def _refresh(self):
+        for shape in self.dirty:
+            self._unlink(shape)
+            if not shape._hasMouseHandlers():
+                continue
+
+            box = shape._getWorldBox()
+            if box is not None:
+                column_0, row_0 = math.floor(box[0] / self.cell_size), math.floor(box[1] / self.cell_size)
+                column_1, row_1 = math.floor(box[2] / self.cell_size), math.floor(box[3] / self.cell_size)
+            if box is None or (column_1 - column_0 + 1) * (row_1 - row_0 + 1) > self.max_cells:
+                self.shape_cells[shape] = None
+                self.everywhere.add(shape)
+                continue
+
+            cells = [(column, row) for column in range(column_0, column_1 + 1) for row in range(row_0, row_1 + 1)]
+            for cell in cells:
+                self.cells.setdefault(cell, set()).add(shape)
+            self.shape_cells[shape] = cells
+
+        self.dirty.clear()
+
+    def query(self, x, y):
+        """
+            returns the shapes with mouse handlers, whose world box contains the point, in draw order
+        """
+        self._refresh()
+
+        cell = (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+        found = []
+        for shape in itertools.chain(self.cells.get(cell, ()), self.everywhere):
+            box = shape._getWorldBox()
+            if box is None or (box[0] <= x <= box[2] and box[1] <= y <= box[3]):
+                found.append(shape)
+
+        self.queries += 1
+        self.candidates += len(found)
+
+        # shapes are appended to shape_buffer in the order of their ids
+        found.sort(key=lambda shape: shape.id)
+        return found
+
+    def getStats(self):
+        return {"shapes": len(self.shape_cells), "cells": len(self.cells), "everywhere": len(self.everywhere),
+                "queries": self.queries, "candidates": self.candidates}
+
+hit_grid = kHitGrid()
+
+# primitive shapes, which the "instanced" renderer draws from a single quad per shape
+PRIMITIVE_ELLIPSE = 0
+PRIMITIVE_RECT = 1
+PRIMITIVE_ROUNDED_RECT = 2
+PRIMITIVE_ARC = 3
+
 class kShape(ABC):
     counter = 0
+    _batchable = True  # drawn by kBatchRenderer from its vertices (no textures, no child shapes)
+    _primitive = None  # PRIMITIVE_* for shapes, which can be drawn without vertices
+    _stencilable = True  # the vertices are an outline, which can be filled with the stencil buffer
+    _morph = None  # kVertexMorph, while a morph is blended on the graphics card
+    _glyphs = None  # kGlyphRun of a text, drawn by kBatchRenderer from the glyph atlas
+    _vertices_stale = False
+    _bounds = None  # cached world box and bounding circle of _localBounds (False if there are none), see _getBounds
 
     def __init__(self, shape = None):            
         self.name = "kShape"
@@ -1166,32 +2098,40 @@ class kShape(ABC):
 
         self.vertices = []
         self._vertices = []
-        self._triangles = []
+        self._triangles = np.zeros((0, 2), dtype=np.float32)
         self._fillMode = GL_TRIANGLE_FAN
         self._vbo = None 
         self._vbo_triangle = None
+        self._vbo_size = 0
+        self._vbo_triangle_size = 0
         self._idGL = None
         self._ui = False 
+        self._custom_vertices = False
+        self._batch_dirty = True
+        self._batch_local = None
+        self._batch_world = None
+        self._matrix = None
         
         self.getReady, self.setReady = kValue(self, "ready", False, update=False)
         
-        self.getRot, self.setRot = kNumber(self, "rot", kstore.rot, update=False)
+        self.getRot, self.setRot = kNumber(self, "rot", kstore.rot, update=False, draw="_drawTransform")
         self.getLineWidth, self.setLineWidth = kNumber(self, "lineWidth", kstore.lineWidth)
 
-        self.getPos, self.setPos, self.getX, self.setX, self.getY, self.setY = kVec2(self, "pos", kstore.pos, update=False)
+        self.getPos, self.setPos, self.getX, self.setX, self.getY, self.setY = kVec2(self, "pos", kstore.pos, update=False, draw="_drawTransform")
 
-        self.getPivot, self.setPivot, self.getPivotX, self.setPivotX, self.getPivotY, self.setPivotY = kVec2(self, "pivot", [0,0], update=False)
+        self.getPivot, self.setPivot, self.getPivotX, self.setPivotX, self.getPivotY, self.setPivotY = kVec2(self, "pivot", [0,0], update=False, draw="_drawTransform")
 
-        self.getFillColor, self.setFillColor = kColor(self, "fillColor", kstore.fillColor, update=False)
-        self.getLineColor, self.setLineColor = kColor(self, "lineColor", kstore.lineColor, update=False)
+        self.getFillColor, self.setFillColor = kColor(self, "fillColor", kstore.fillColor, update=False, draw="_drawColor")
+        self.getLineColor, self.setLineColor = kColor(self, "lineColor", kstore.lineColor, update=False, draw="_drawColor")
 
         self.getFill, self.setFill = kValue(self, "fill", kstore.fill, update=False)
         self.getLine, self.setLine = kValue(self, "line", kstore.line, update=False)
+        self.getFillRule, self.setFillRule = kValue(self, "fillRule", "auto", update=False, draw="_drawFillRule")
 
-        self.getOnMousePress, self.setOnMousePress = kValue(self, "onMousePress", None, update=False)
-        self.getOnMouseRelease, self.setOnMouseRelease = kValue(self, "onMouseRelease", None, update=False)
-        self.getOnMouseEnter, self.setOnMouseEnter = kValue(self, "onMouseEnter", None, update=False)
-        self.getOnMouseExit, self.setOnMouseExit = kValue(self, "onMouseExit", None, update=False)
+        self.getOnMousePress, self.setOnMousePress = kValue(self, "onMousePress", None, update=False, draw="_drawHandlers")
+        self.getOnMouseRelease, self.setOnMouseRelease = kValue(self, "onMouseRelease", None, update=False, draw="_drawHandlers")
+        self.getOnMouseEnter, self.setOnMouseEnter = kValue(self, "onMouseEnter", None, update=False, draw="_drawHandlers")
+        self.getOnMouseExit, self.setOnMouseExit = kValue(self, "onMouseExit", None, update=False, draw="_drawHandlers")
         
         self._mouse_over = False
 
@@ -1203,6 +2143,7 @@ class kShape(ABC):
             self.initLineColor(shape.lineColor)
             self.initFill(shape.fill)
             self.initLine(shape.line)
+            self.initFillRule(shape.fillRule)
             self.initOnMousePress(shape.onMousePress)
             self.initOnMouseRelease(shape.onMouseRelease)
             self.initOnMouseEnter(shape.onMouseEnter)
@@ -1217,6 +2158,7 @@ class kShape(ABC):
         kstore.unscaleAnim()
 
         shape_buffer.append(self)
+        hit_grid.add(self)
 
     def getPos(self): 
         """
@@ -1352,6 +2294,24 @@ class kShape(ABC):
             - circle.setFill(False)
         """
         pass
+    def getFillRule(self): 
+        """
+            returns how polygons are filled: "auto", "triangles", "evenodd" or "nonzero"
+        """
+        pass
+    def setFillRule(self, rule): 
+        """
+            define how polygons (and shapes with changed vertices) are filled
+
+            - "auto" (default): "triangles" for up to setStencilThreshold() vertices, "evenodd" above
+            - "triangles": the polygon is cut into triangles (on the cpu, every time its vertices change)
+            - "evenodd": filled on the graphics card using the stencil buffer, a point is inside, if a ray from it crosses the border an odd number of times
+            - "nonzero": filled on the graphics card using the stencil buffer, a point is inside, if the border winds around it
+
+            **example**
+            - polygon.setFillRule("evenodd")
+        """
+        pass
     def getFillColor(self): 
         """
             returns the shape fill color as a list [r,g,b,a] 
@@ -1441,6 +2401,8 @@ class kShape(ABC):
     def _remove(self):
         self.hide()
         shape_buffer.remove(self)
+        hit_grid.remove(self)
+        focus_manager.blur(self)
 
     def remove(self):
         """
@@ -1524,7 +2486,7 @@ class kShape(ABC):
         color = toColor(rgba)
         self._lineColor = color
         self._fillColor = color
-        self._draw()
+        self._drawColor()
 
     def getColor(self):
         """
@@ -1565,41 +2527,127 @@ class kShape(ABC):
             print("")
             exit()
 
-        
-        flattened_vertices = [float(coord) for vertex in self._vertices for coord in vertex]
-        vertex_data = struct.pack(f'{len(flattened_vertices)}f', *flattened_vertices)
 
-        if self._vbo is not None:
-            glDeleteBuffers(1, [self._vbo])
-            self._vbo = None 
-        
-        self._vbo = glGenBuffers(1)
+        self._vbo, self._vbo_size = self._uploadBuffer(self._vbo, self._vbo_size, self._vertices)
 
-        glBindBuffer(GL_ARRAY_BUFFER, self._vbo)
-        glBufferData(GL_ARRAY_BUFFER, len(vertex_data), vertex_data, GL_DYNAMIC_DRAW)
-        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        if self._fillMode == GL_TRIANGLES and self._getStencilRule() is None:
+            self._triangles = toVertexArray(tessellate(self._vertices))
+            self._vbo_triangle, self._vbo_triangle_size = self._uploadBuffer(self._vbo_triangle, self._vbo_triangle_size, self._triangles)
+        else:
+            self._triangles = np.zeros((0, 2), dtype=np.float32)
 
-        if self._fillMode == GL_TRIANGLES:
-            self._triangles = tessellate(copy.deepcopy(self._vertices))
-            
-            flattened_triangles = [float(c) for vertex in self._triangles for c in vertex]            
-            triangle_data = struct.pack(f'{len(flattened_triangles)}f', *flattened_triangles)
+    def _getStencilRule(self):
+        """
+            returns "evenodd" or "nonzero", if the shape is filled with the stencil buffer instead of triangles, else None
+        """
+        if self._fillMode != GL_TRIANGLES or not self._stencilable:
+            return None
+        if self._fillRule in ("evenodd", "nonzero"):
+            return self._fillRule
+        if self._fillRule == "auto" and len(self._vertices) > kstore.stencil_threshold:
+            return "evenodd"
+        return None
 
-            if self._vbo_triangle is not None:
-                glDeleteBuffers(1, [self._vbo_triangle])
-                self._vbo_triangle = None 
-            
-            self._vbo_triangle = glGenBuffers(1)
+    def _drawFillRule(self):
+        if self._vbo is not None and self._fillMode == GL_TRIANGLES:
+            self._generateVBO()
+        self._draw()
 
-            glBindBuffer(GL_ARRAY_BUFFER, self._vbo_triangle)
-            glBufferData(GL_ARRAY_BUFFER, len(triangle_data), triangle_data, GL_DYNAMIC_DRAW)
-            glBindBuffer(GL_ARRAY_BUFFER, 0)
+    def _uploadBuffer(self, vbo, size, data):
+        """
+            uploads the float32 array into the vertex buffer, which is only reallocated if the data does not fit
 
-    def _updateShape(self):
-        self._vertices = self._generateVertices()
-        self._generateVBO()
+            returns the buffer id and its size in bytes
+        """
+        if vbo is None:
+            vbo = glGenBuffers(1)
+            size = 0
+
+        glBindBuffer(GL_ARRAY_BUFFER, vbo)
+        if data.nbytes > size:
+            size = data.nbytes
+            glBufferData(GL_ARRAY_BUFFER, size, data, GL_DYNAMIC_DRAW)
+        elif data.nbytes > 0:
+            # orphan the old storage, so the driver does not wait for frames still using it
+            glBufferData(GL_ARRAY_BUFFER, size, None, GL_DYNAMIC_DRAW)
+            glBufferSubData(GL_ARRAY_BUFFER, 0, data.nbytes, data)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        return vbo, size
+
+    @property
+    def _vertices(self):
+        if self._morph is not None:
+            return self._morph.getVertices()
+        # primitives drawn by the instanced renderer only generate their vertices when somebody asks for them
+        if self._vertices_stale:
+            self._vertices_stale = False
+            self._vertex_array = toVertexArray(self._generateVertices())
+        return self._vertex_array
+
+    @_vertices.setter
+    def _vertices(self, vertices):
+        # (N,2) float32 from generation to upload, read-only so that shapes can share it without copies
+        self._vertices_stale = False
+        self._vertex_array = toVertexArray(vertices)
+
+    def _isBatched(self):
+        return kstore.renderer in ("batch", "instanced") and self._batchable
+
+    def _isInstanced(self):
+        return kstore.renderer == "instanced" and self._batchable and self._primitive is not None and not self._custom_vertices
+
+    def _primitiveParams(self):
+        """
+            returns (half width, half height, parameter) of a primitive shape for the instanced renderer
+            (by default the half extents of the local bounds, overridden by the primitive shapes)
+        """
+        bounds = self._localBounds()
+        if bounds is None:
+            return (0.0, 0.0, 0.0)
+        return ((bounds[2] - bounds[0]) / 2, (bounds[3] - bounds[1]) / 2, 0.0)
+
+    def _instance(self):
+        """
+            returns the per shape attributes of the instanced renderer as a list of 16 floats:
+            offset x/y, rotation, primitive, half width/height, parameter, line width, fill rgba, line rgba
+        """
+        matrix = self._getMatrix()
+        half_width, half_height, parameter = self._primitiveParams()
+        fill_color = [c/255 for c in self._fillColor]
+        line_color = [c/255 for c in self._lineColor]
+        if not self._fill:
+            fill_color[3] = 0
+        if not self._line:
+            line_color[3] = 0
+
+        return [
+            matrix[0][2], matrix[1][2], math.radians(self._rot), self._primitive,
+            half_width, half_height, parameter, self._lineWidth,
+            *fill_color, *line_color,
+        ]
+
+    def _updateShape(self):
+        self._custom_vertices = False
+        self._bounds = None
+        hit_grid.touch(self)
+        if self._isInstanced():
+            self._vertices_stale = True
+            return
+
+        self._vertices = self._generateVertices()
+        self._generateVBO()
 
     def _draw(self):
+        if self._isInstanced():
+            the_renderer.update(self)
+            return
+
+        if self._isBatched():
+            self._batch_dirty = True
+            the_renderer.invalidate()
+            return
+
         if not self._ready or self._vbo is None:
             return 
         
@@ -1615,7 +2663,29 @@ class kShape(ABC):
         glRotatef(self._rot, 0, 0, 1)
         glTranslatef(-self._pivot[0], -self._pivot[1], 0)
 
-        if self._fill:
+        stencil_rule = self._getStencilRule()
+        if self._fill and stencil_rule is not None and len(self._vertices) >= 3:
+            glBindBuffer(GL_ARRAY_BUFFER, self._vbo)
+            glEnableVertexAttribArray(0)
+            glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, 0, None)
+            glColor4ub(*list([int(c) for c in self._fillColor]))
+            low = self._vertices.min(axis=0).tolist()
+            high = self._vertices.max(axis=0).tolist()
+
+            beginStencilFill(stencil_rule)
+            glDrawArrays(GL_TRIANGLE_FAN, 0, len(self._vertices))
+            coverStencilFill()
+            glBegin(GL_QUADS)
+            glVertex2f(low[0], low[1])
+            glVertex2f(high[0], low[1])
+            glVertex2f(high[0], high[1])
+            glVertex2f(low[0], high[1])
+            glEnd()
+            endStencilFill()
+
+            glDisableVertexAttribArray(0)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+        elif self._fill:
             if self._fillMode == GL_TRIANGLE_FAN:
                 glBindBuffer(GL_ARRAY_BUFFER, self._vbo)
                 glEnableVertexAttribArray(0)
@@ -1648,6 +2718,128 @@ class kShape(ABC):
 
         self._idGL = idGL
 
+    def _drawTransform(self):
+        # position, rotation or pivot changed: the vertices stay the same
+        self._matrix = None
+        self._bounds = None
+        hit_grid.touch(self)
+        if self._isBatched():
+            the_renderer.update(self)
+        else:
+            self._draw()
+
+    def _drawHandlers(self):
+        # only shapes with mouse handlers are in the hit grid
+        hit_grid.touch(self)
+
+    def _hasMouseHandlers(self):
+        return bool(self._onMousePress or self._onMouseRelease or self._onMouseEnter or self._onMouseExit)
+
+    def _localBounds(self):
+        """
+            returns the box (x0, y0, x1, y1) outside of which contains() is False, in local coordinates
+            (see _localFrame), or None, if the shape has no such box
+        """
+        return None
+
+    def _localFrame(self):
+        """
+            returns (center, origin) of the coordinates, which contains() tests in:
+            a local point p is at center + rotated(p - origin) in the world
+        """
+        return self._pos, self._pivot
+
+    def _getBounds(self):
+        """
+            returns (box, circle) of the local bounds in the world, or None:
+            the axis aligned box (x0, y0, x1, y1) and the bounding circle (x, y, radius)
+        """
+        if self._bounds is None:
+            # while a morph runs on the graphics card, its box covers every fraction
+            box = self._morph.box if self._morph is not None else self._localBounds()
+            if box is None:
+                self._bounds = False
+            else:
+                (center_x, center_y), (origin_x, origin_y) = self._localFrame()
+                x0, y0, x1, y1 = box
+                half_width, half_height = abs(x1 - x0) / 2, abs(y1 - y0) / 2
+                middle_x, middle_y = (x0 + x1) / 2 - origin_x, (y0 + y1) / 2 - origin_y
+
+                # the middle of the box is rotated, the half extents of a rotated box grow with absolute sine and cosine
+                angle = math.radians(self._rot)
+                cos_theta = math.cos(angle)
+                sin_theta = math.sin(angle)
+                middle_x, middle_y = (center_x + middle_x * cos_theta - middle_y * sin_theta,
+                                      center_y + middle_x * sin_theta + middle_y * cos_theta)
+                # (a little larger, so that rounding never rejects a point on the outline)
+                extent_x = half_width * abs(cos_theta) + half_height * abs(sin_theta) + 1e-6
+                extent_y = half_width * abs(sin_theta) + half_height * abs(cos_theta) + 1e-6
+
+                self._bounds = ((middle_x - extent_x, middle_y - extent_y, middle_x + extent_x, middle_y + extent_y),
+                                (middle_x, middle_y, math.hypot(half_width, half_height)))
+
+        return self._bounds or None
+
+    def _getWorldBox(self):
+        """
+            returns the axis aligned box (x0, y0, x1, y1), which contains the local bounds in the world, or None
+        """
+        bounds = self._getBounds()
+        return bounds[0] if bounds else None
+
+    def _inBounds(self, x, y):
+        # the cheap test before contains() does the exact one
+        bounds = self._getBounds()
+        if not bounds:
+            return True
+        box = bounds[0]
+        return box[0] <= x <= box[2] and box[1] <= y <= box[3]
+
+    def _boundsMask(self, points):
+        bounds = self._getBounds()
+        if not bounds:
+            return np.ones(len(points), dtype=bool)
+        box = bounds[0]
+        return (box[0] <= points[:, 0]) & (points[:, 0] <= box[2]) & (box[1] <= points[:, 1]) & (points[:, 1] <= box[3])
+
+    def getBounds(self):
+        """
+            returns the box [x0, y0, x1, y1] and the circle [x, y, radius] around the shape in world coordinates
+            (None, if the shape has no bounds)
+
+            - the bounds are kept until the shape moves, rotates or changes its size or vertices
+            - contains() is only True inside of them
+
+            **example**
+            - box, circle = shape.getBounds()
+        """
+        bounds = self._getBounds()
+        if not bounds:
+            return None
+        return [list(bounds[0]), list(bounds[1])]
+
+    def _drawColor(self):
+        if self._isBatched():
+            the_renderer.update(self)
+        else:
+            self._draw()
+
+    def _getMatrix(self):
+        """
+            returns the 2x3 affine matrix, which maps the shape's vertices to world coordinates
+        """
+        if self._matrix is None:
+            angle = math.radians(self._rot)
+            cos_theta = math.cos(angle)
+            sin_theta = math.sin(angle)
+            pivot_x, pivot_y = self._pivot[0], self._pivot[1]
+
+            self._matrix = np.array([
+                [cos_theta, -sin_theta, self._pos[0] - (cos_theta * pivot_x - sin_theta * pivot_y)],
+                [sin_theta, cos_theta, self._pos[1] - (sin_theta * pivot_x + cos_theta * pivot_y)],
+            ])
+        return self._matrix
+
     def _drawGL(self):
         if self._idGL is None or not self._ready:
             return 
@@ -1773,27 +2965,85 @@ class kShape(ABC):
         """
         pass
 
+    def containsMany(self, points):
+        """
+            returns an array of True and False, one for each point: True, if the point is inside the shape
+
+            - points is a list of [x, y] or an (N,2) numpy array
+            - like contains(), but all points are tested at once
+
+            **examples**
+
+            - shape.containsMany([[100,100], [200,300]])
+            - inside = points[shape.containsMany(points)] *the points inside of the shape*
+        """
+        points = toPointArray(points)
+        return np.array([bool(self.contains(x, y)) for x, y in points.tolist()], dtype=bool)
+
+    def _localPoints(self, points):
+        # the points rotated back around pos, plus the pivot (as in most contains() methods)
+        angle = math.radians(self._rot)
+        cos_theta = math.cos(angle)
+        sin_theta = math.sin(angle)
+        local_x = points[:, 0] - self._pos[0]
+        local_y = points[:, 1] - self._pos[1]
+        return (local_x * cos_theta + local_y * sin_theta + self._pivot[0],
+                -local_x * sin_theta + local_y * cos_theta + self._pivot[1])
+
     def _getVertices(self):
         return self._vertices
+
+    def _canMorphOnGPU(self):
+        return self._isBatched() and the_renderer.morph_supported
+
+    def _beginMorph(self, begin, end):
+        # the last morph, which began, is drawn
+        self._morph = kVertexMorph(begin, end)
+        self._bounds = None
+        hit_grid.touch(self)
+        self._batch_dirty = True
+        the_renderer.invalidate()
+        return self._morph
+
+    def _setMorphFraction(self, morph, fraction):
+        morph.fraction = fraction
+
+    def _endMorph(self, morph):
+        if morph.vbo is not None:
+            the_renderer.garbage.append(morph.vbo)
+            morph.vbo = None
+        if self._morph is morph:
+            self._morph = None
+            self._bounds = None
+            hit_grid.touch(self)
+            self._batch_dirty = True
+            the_renderer.invalidate()
     
     def _setVertices(self, vertices):
         self._fillMode = GL_TRIANGLES
-        self._vertices = copy.deepcopy(vertices)
+        self._custom_vertices = True
+        self._vertices = vertices
+        self._bounds = None
+        hit_grid.touch(self)
         self._generateVBO()
         self._draw()
 
     def getVertices(self):
         """
-            returns a list of vertices of the shape's border
+            returns the vertices of the shape's border as a (N,2) numpy array (read-only)
         """
-        return self.generateVertices()
+        return toVertexArray(self.generateVertices())
 
-    def setVertices(self, vertices):
+    def setVertices(self, vertices, alignment="fft"):
         """
-            set the list of vertices of the shape's border
+            set the vertices of the shape's border (a list of [x,y] or a (N,2) numpy array)
+
+            - alignment "fft" (default) matches the old and new border quickly, even for many vertices (the same matching as "exact" for up to 512 vertices, for more vertices it may rarely pick an equally good or slightly worse one)
+            - alignment "exact" tries every vertex pairing (slow for detailed shapes)
         """
-        self.vertices = copy.deepcopy(vertices) 
-        action_queue.add(kShapeMatcher(copy.deepcopy(vertices), self._getVertices, self._setVertices))
+        vertices = toVertexArray(vertices)
+        self.vertices = vertices
+        action_queue.add(kShapeMatcher(vertices, self._getVertices, self._setVertices, alignment, shape=self))
         
     def toRect(self, *size):
         """
@@ -1934,6 +3184,8 @@ class kShape(ABC):
         return new_shape 
 
 class kEllipse(kShape):
+    _primitive = PRIMITIVE_ELLIPSE
+
     def __init__(self, *size, shape=None):
         super().__init__(shape)
         self.name = "kEllipse"
@@ -2000,31 +3252,26 @@ class kEllipse(kShape):
         
         return num_segments
 
+    def _primitiveParams(self):
+        return abs(self._size[0]), abs(self._size[1]), 0
+
     def _generateVertices(self):
         self._fillMode = GL_TRIANGLE_FAN
         num_segments = self._calculateNumSegments(*self._size)
-        vertices = []
-        for i in range(num_segments):
-            theta = 2.0 * math.pi * i / num_segments  # Angle in radians
-            x = self._size[0] * math.cos(theta)  # X coordinate
-            y = self._size[1] * math.sin(theta)  # Y coordinate
-            vertices.append([x, y])
-        
-        return vertices
+        return geometry_cache.ellipse(self._size[0], self._size[1], num_segments)
 
     def generateVertices(self):
+        # a new list, the cached array of geometry_cache is shared and read-only
         num_segments = self._calculateNumSegments(*self.size)
-        vertices = []
-        for i in range(num_segments):
-            theta = 2.0 * math.pi * i / num_segments  # Angle in radians
-            x = self.size[0] * math.cos(theta)  # X coordinate
-            y = self.size[1] * math.sin(theta)  # Y coordinate
-            vertices.append([x, y])
-        
-        return vertices
+        return geometry_cache.ellipse(self.size[0], self.size[1], num_segments).tolist()
+
+    def _localBounds(self):
+        return (-self._size[0], -self._size[1], self._size[0], self._size[1])
 
     def contains(self, *point):
         x, y = toFloatList(point)
+        if not self._inBounds(x, y):
+            return False
 
         if self._size[0] == 0 or self._size[1] == 0:
             return False 
@@ -2042,6 +3289,14 @@ class kEllipse(kShape):
 
         return (rotated_x / self._size[0]) ** 2 + (rotated_y / self._size[1]) ** 2 <= 1
 
+    def containsMany(self, points):
+        points = toPointArray(points)
+        if self._size[0] == 0 or self._size[1] == 0:
+            return np.zeros(len(points), dtype=bool)
+
+        rotated_x, rotated_y = self._localPoints(points)
+        return (rotated_x / self._size[0]) ** 2 + (rotated_y / self._size[1]) ** 2 <= 1
+
 class kCircle(kEllipse):
     def __init__(self, radius, *args, shape=None):
         super().__init__(radius, radius, shape=shape)
@@ -2066,6 +3321,8 @@ class kCircle(kEllipse):
         self.setSize([radius, radius])
 
 class kRect(kShape):
+    _primitive = PRIMITIVE_RECT
+
     def __init__(self, *size, shape=None):
         super().__init__(shape)
         self.name = "kRect"
@@ -2130,6 +3387,9 @@ class kRect(kShape):
 
         return the_copy
 
+    def _primitiveParams(self):
+        return abs(self._size[0])/2, abs(self._size[1])/2, 0
+
     def _generateVertices(self):
         self._fillMode = GL_TRIANGLE_FAN
 
@@ -2160,8 +3420,17 @@ class kRect(kShape):
 
         return vertices
     
+    def _localBounds(self):
+        return (-self._size[0] / 2, -self._size[1] / 2, self._size[0] / 2, self._size[1] / 2)
+
+    def _localFrame(self):
+        # contains() does not use the pivot
+        return self._pos, (0, 0)
+
     def contains(self, *point):
         x, y = toFloatList(point)
+        if not self._inBounds(x, y):
+            return False
 
         # Translate to local space
         local_x = x - self._pos[0]
@@ -2181,7 +3450,26 @@ class kRect(kShape):
 
         return (-half_width <= rotated_x <= half_width) and (-half_height <= rotated_y <= half_height)
 
+    def containsMany(self, points):
+        points = toPointArray(points)
+        local_x = points[:, 0] - self._pos[0]
+        local_y = points[:, 1] - self._pos[1]
+
+        angle = math.radians(-self._rot)
+        cos_theta = math.cos(angle)
+        sin_theta = math.sin(angle)
+
+        rotated_x = local_x * cos_theta - local_y * sin_theta
+        rotated_y = local_x * sin_theta + local_y * cos_theta
+
+        half_width = self._size[0] / 2
+        half_height = self._size[1] / 2
+
+        return (-half_width <= rotated_x) & (rotated_x <= half_width) & (-half_height <= rotated_y) & (rotated_y <= half_height)
+
 class kRoundedRect(kShape):
+    _primitive = PRIMITIVE_ROUNDED_RECT
+
     def __init__(self, width, height, radius, *args, shape=None):
         super().__init__(shape)
         self.name = "kRoundedRect"
@@ -2263,93 +3551,30 @@ class kRoundedRect(kShape):
         self.radius = radius
         action_queue.add(kInterpolator(radius, self._getRadius, self._setCircle))
     
+    def _primitiveParams(self):
+        return self._size[0]/2, self._size[1]/2, min(self._size[0]/2, self._size[1]/2, self._radius)
+
     def _generateVertices(self):
         self._fillMode = GL_TRIANGLE_FAN
 
-        vertices = []
-        num_segments = 16
-
         radius = min(self._size[0]/2, self._size[1]/2, self._radius)
-        corners = [
-            (radius, radius), 
-            (self._size[0] - radius, radius),
-            (self._size[0] - radius, self._size[1] - radius), 
-            (radius, self._size[1] - radius)
-        ]
-
-        angles = [
-            (math.pi, 1.5 * math.pi), 
-            (1.5 * math.pi, 2 * math.pi),  
-            (0, 0.5 * math.pi),  
-            (0.5 * math.pi, math.pi)  
-        ]
-
-        for i in range(4):
-            cx, cy = corners[i]
-            start_angle, end_angle = angles[i]
-            for j in range(num_segments + 1):
-                theta = start_angle + (end_angle - start_angle) * j / num_segments
-                x = cx + radius * math.cos(theta)
-                y = cy + radius * math.sin(theta)
-                vertices.append([x, y])
-
-            if i == 0:
-                vertices.append([self._size[0] - radius, 0])
-            elif i == 1:
-                vertices.append([self._size[0], self._size[1] - radius])
-            elif i == 2:
-                vertices.append([radius, self._size[1]])
-            elif i == 3:
-                vertices.append([0, radius])
-        
-        for vertex in vertices:
-            vertex[0] -= self._size[0]/2
-            vertex[1] -= self._size[1]/2
-        return vertices 
+        return geometry_cache.roundedRect(self._size[0], self._size[1], radius, 16)
     
     def generateVertices(self):
-        vertices = []
-        num_segments = 20
+        # a new list, the cached array of geometry_cache is shared and read-only
+        return geometry_cache.roundedRect(self.size[0], self.size[1], self.radius, 20).tolist()
 
-        corners = [
-            (self.radius, self.radius), 
-            (self.size[0] - self.radius, self.radius),
-            (self.size[0] - self.radius, self.size[1] - self.radius), 
-            (self.radius, self.size[1] - self.radius)
-        ]
+    def _localBounds(self):
+        return (-self._size[0] / 2, -self._size[1] / 2, self._size[0] / 2, self._size[1] / 2)
 
-        angles = [
-            (math.pi, 1.5 * math.pi), 
-            (1.5 * math.pi, 2 * math.pi),  
-            (0, 0.5 * math.pi),  
-            (0.5 * math.pi, math.pi)  
-        ]
-
-        for i in range(4):
-            cx, cy = corners[i]
-            start_angle, end_angle = angles[i]
-            for j in range(num_segments + 1):
-                theta = start_angle + (end_angle - start_angle) * j / num_segments
-                x = cx + self.radius * math.cos(theta)
-                y = cy + self.radius * math.sin(theta)
-                vertices.append([x, y])
-
-            if i == 0:
-                vertices.append([self.size[0] - self.radius, 0])
-            elif i == 1:
-                vertices.append([self.size[0], self.size[1] - self.radius])
-            elif i == 2:
-                vertices.append([self.radius, self.size[1]])
-            elif i == 3:
-                vertices.append([0, self.radius])
-        
-        for vertex in vertices:
-            vertex[0] -= self.size[0]/2
-            vertex[1] -= self.size[1]/2
-        return vertices 
+    def _localFrame(self):
+        # contains() rotates around pos + pivot
+        return (self._pos[0] + self._pivot[0], self._pos[1] + self._pivot[1]), self._pivot
 
     def contains(self, *point):
         x, y = toFloatList(point)
+        if not self._inBounds(x, y):
+            return False
 
         # Step 1: Translate global point to local space
         local_x = x - self._pos[0]
@@ -2391,8 +3616,40 @@ class kRoundedRect(kShape):
                 return True
 
         return False
+
+    def containsMany(self, points):
+        points = toPointArray(points)
+        local_x = points[:, 0] - self._pos[0]
+        local_y = points[:, 1] - self._pos[1]
+
+        angle = math.radians(-self._rot)
+        cos_theta = math.cos(angle)
+        sin_theta = math.sin(angle)
+
+        translated_x = local_x - self._pivot[0]
+        translated_y = local_y - self._pivot[1]
+
+        rotated_x = translated_x * cos_theta - translated_y * sin_theta + self._pivot[0]
+        rotated_y = translated_x * sin_theta + translated_y * cos_theta + self._pivot[1]
+
+        half_width = self._size[0] / 2
+        half_height = self._size[1] / 2
+        radius = self._radius
+
+        inside = (-half_width + radius <= rotated_x) & (rotated_x <= half_width - radius) & (-half_height <= rotated_y) & (rotated_y <= half_height)
+        inside |= (-half_width <= rotated_x) & (rotated_x <= half_width) & (-half_height + radius <= rotated_y) & (rotated_y <= half_height - radius)
+
+        for cx, cy in [(-half_width + radius, -half_height + radius), (half_width - radius, -half_height + radius),
+                       (-half_width + radius, half_height - radius), (half_width - radius, half_height - radius)]:
+            dx = rotated_x - cx
+            dy = rotated_y - cy
+            inside |= dx * dx + dy * dy <= radius * radius
+
+        return inside
     
 class kImage(kShape):
+    _batchable = False
+
     def __init__(self, file_name, width):
         super().__init__()
         self.name = "kImage"
@@ -2593,8 +3850,13 @@ class kImage(kShape):
 
         self._idGL = idGL
 
+    def _localBounds(self):
+        return (0, 0, self._size[0], self._size[1])
+
     def contains(self, *point):
         x, y = toFloatList(point)
+        if not self._inBounds(x, y):
+            return False
         
         local_x = x - self._pos[0]
         local_y = y - self._pos[1]
@@ -2606,6 +3868,10 @@ class kImage(kShape):
         rotated_y = -local_x * sin_theta + local_y * cos_theta + self._pivot[1]
 
         return (0 <= rotated_x <= self._size[0]) and (0 <= rotated_y <= self._size[1])
+
+    def containsMany(self, points):
+        rotated_x, rotated_y = self._localPoints(toPointArray(points))
+        return (0 <= rotated_x) & (rotated_x <= self._size[0]) & (0 <= rotated_y) & (rotated_y <= self._size[1])
     
     
 class kTriangle(kShape):
@@ -2679,8 +3945,13 @@ class kTriangle(kShape):
 
         return vertices
 
+    def _localBounds(self):
+        return (0, 0, self._length, (math.sqrt(3) / 2) * self._length)
+
     def contains(self, *point):
         x, y = toFloatList(point)
+        if not self._inBounds(x, y):
+            return False
         
         local_x = x - self._pos[0]
         local_y = y - self._pos[1]
@@ -2706,6 +3977,24 @@ class kTriangle(kShape):
 
         return (b1 == b2) and (b2 == b3)
 
+    def containsMany(self, points):
+        rotated_x, rotated_y = self._localPoints(toPointArray(points))
+
+        height = (math.sqrt(3) / 2) * self._length
+
+        v0 = (self._length, 0)
+        v1 = (self._length / 2, height)
+        v2 = (0, 0)
+
+        def sign(p2, p3):
+            return (rotated_x - p3[0]) * (p2[1] - p3[1]) - (p2[0] - p3[0]) * (rotated_y - p3[1])
+
+        b1 = sign(v0, v1) < 0.0
+        b2 = sign(v1, v2) < 0.0
+        b3 = sign(v2, v0) < 0.0
+
+        return (b1 == b2) & (b2 == b3)
+
 class kCursor(kTriangle):
     def __init__(self):
         kstore.scaleAnim(0)
@@ -2713,6 +4002,7 @@ class kCursor(kTriangle):
         self.name = "kCursor"
 
         shape_buffer.remove(self)
+        hit_grid.remove(self)
 
         self._line = True
         self._line_width = 2
@@ -2742,6 +4032,8 @@ class kCursor(kTriangle):
         return vertices
 
 class kArc(kShape):
+    _primitive = PRIMITIVE_ARC
+
     def __init__(self, radius, angle, *args, shape=None):
         super().__init__(shape)
         self.name = "kArc"
@@ -2796,37 +4088,26 @@ class kArc(kShape):
         
         return num_segments
     
+    def _primitiveParams(self):
+        return abs(self._radius), abs(self._radius), math.radians(self._angle)
+
     def _generateVertices(self):
         self._fillMode = GL_TRIANGLE_FAN
-        vertices = [[0,0]]
         num_segments = self._calculateNumSegments(self._radius, self._angle)
-
-        angle_step = self._angle/180*math.pi / num_segments
-
-        for i in range(num_segments+1):
-            theta = angle_step * i
-            x = self._radius * math.cos(theta)
-            y = self._radius * math.sin(theta)
-            vertices.append([x, y])
-
-        return vertices
+        return geometry_cache.arc(self._radius, self._angle, num_segments)
 
     def generateVertices(self):
-        vertices = [[0,0]]
+        # a new list, the cached array of geometry_cache is shared and read-only
         num_segments = self._calculateNumSegments(self.radius, self.angle)
+        return geometry_cache.arc(self.radius, self.angle, num_segments).tolist()
 
-        angle_step = self.angle/180*math.pi / num_segments
-
-        for i in range(num_segments+1):
-            theta = angle_step * i
-            x = self.radius * math.cos(theta)
-            y = self.radius * math.sin(theta)
-            vertices.append([x, y])
-
-        return vertices
+    def _localBounds(self):
+        return (0, 0, 2 * self._radius, 2 * self._radius)
 
     def contains(self, *point):
         x, y = toFloatList(point)
+        if not self._inBounds(x, y):
+            return False
         
         local_x = x - self._pos[0]
         local_y = y - self._pos[1]
@@ -2844,6 +4125,14 @@ class kArc(kShape):
         point_angle = math.degrees(math.atan2(rotated_y, rotated_x))
         return 0 <= point_angle <= self._angle
 
+    def containsMany(self, points):
+        rotated_x, rotated_y = self._localPoints(toPointArray(points))
+        rotated_x = rotated_x - self._radius
+        rotated_y = rotated_y - self._radius
+
+        point_angle = np.degrees(np.arctan2(rotated_y, rotated_x))
+        return (rotated_x ** 2 + rotated_y ** 2 <= self._radius ** 2) & (0 <= point_angle) & (point_angle <= self._angle)
+
 class kLine(kShape):
     def __init__(self, *size, shape=None):
         super().__init__(shape) 
@@ -2998,15 +4287,26 @@ class kLine(kShape):
         self.line = False 
         return vertices 
 
+    def _localBounds(self):
+        if len(self._vertices) == 0:
+            return (0, 0, 0, 0)
+        low = np.min(self._vertices, axis=0)
+        high = np.max(self._vertices, axis=0)
+        return (float(low[0]), float(low[1]), float(high[0]), float(high[1]))
+
     def contains(self, x, y):
         return False
 
+    def containsMany(self, points):
+        return np.zeros(len(toPointArray(points)), dtype=bool)
+
 class kPolygon(kShape):
     def __init__(self, vertices, *args, shape=None):
         super().__init__(shape)
         self.name = "kPolygon"
-        self.vertices = copy.deepcopy(vertices)
-        self._vertices = copy.deepcopy(vertices)
+        vertices = toVertexArray(vertices)
+        self.vertices = vertices
+        self._vertices = vertices
 
         if shape is None:
             self._setVertices([])
@@ -3014,9 +4314,9 @@ class kPolygon(kShape):
             if length > 0:
                 kstore.scaleAnim(1/length)
                 for i in range(1,len(vertices)):
-                    self.setVertices(copy.deepcopy(vertices[:i+1]))
+                    self.setVertices(vertices[:i+1])
                 kstore.unscaleAnim()
-            self.vertices = copy.deepcopy(vertices)
+            self.vertices = vertices
 
     def copy(self):
         kstore.scaleAnim(0)
@@ -3029,10 +4329,11 @@ class kPolygon(kShape):
     
     def _generateVertices(self):
         self._fillMode = GL_TRIANGLES
-        return copy.deepcopy(self._vertices)
+        return self._vertices
 
     def generateVertices(self):
-        return copy.deepcopy(self.vertices)
+        # a new list, self.vertices is a read-only array (see toVertexArray)
+        return np.asarray(self.vertices).tolist()
 
     def addVertex(self, *vertex):
         """
@@ -3043,12 +4344,20 @@ class kPolygon(kShape):
             - polygon.addVertex([100,200]) *as a list*
         """
         vertex = toFloatList(vertex)
-        vertices = self.generateVertices()
-        vertices.append(vertex)  
+        vertices = np.vstack([self.generateVertices(), [vertex]])
         self.setVertices(vertices)
 
+    def _localBounds(self):
+        if len(self._vertices) == 0:
+            return (0, 0, 0, 0)
+        low = np.min(self._vertices, axis=0)
+        high = np.max(self._vertices, axis=0)
+        return (float(low[0]), float(low[1]), float(high[0]), float(high[1]))
+
     def contains(self, *point):
         x, y = toFloatList(point)
+        if not self._inBounds(x, y):
+            return False
         
         local_x = x - self._pos[0]
         local_y = y - self._pos[1]
@@ -3060,11 +4369,12 @@ class kPolygon(kShape):
         rotated_x = local_x * cos_theta + local_y * sin_theta + self._pivot[0]
         rotated_y = -local_x * sin_theta + local_y * cos_theta + self._pivot[1]
 
-        n = len(self._vertices)
+        vertices = self._vertices.tolist()
+        n = len(vertices)
         inside = False
-        p1x, p1y = self._vertices[0]
+        p1x, p1y = vertices[0]
         for i in range(n + 1):
-            p2x, p2y = self._vertices[i % n]
+            p2x, p2y = vertices[i % n]
             if rotated_y > min(p1y, p2y):
                 if rotated_y <= max(p1y, p2y):
                     if rotated_x <= max(p1x, p2x):
@@ -3075,6 +4385,31 @@ class kPolygon(kShape):
             p1x, p1y = p2x, p2y
 
         return inside
+
+    def containsMany(self, points):
+        points = toPointArray(points)
+        inside = np.zeros(len(points), dtype=bool)
+        if len(self._vertices) == 0:
+            return inside
+
+        # only the points in the bounds cross any edges
+        candidates = np.flatnonzero(self._boundsMask(points))
+        rotated_x, rotated_y = self._localPoints(points[candidates])
+        crossings = np.zeros(len(candidates), dtype=bool)
+
+        # the same ray casting as contains(), one edge at a time for all points
+        vertices = np.asarray(self._vertices, dtype=np.float64)
+        for (p1x, p1y), (p2x, p2y) in zip(vertices.tolist(), np.roll(vertices, -1, axis=0).tolist()):
+            if p1y == p2y:
+                continue
+            crossing = (rotated_y > min(p1y, p2y)) & (rotated_y <= max(p1y, p2y)) & (rotated_x <= max(p1x, p2x))
+            if p1x != p2x:
+                xinters = (rotated_y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
+                crossing &= rotated_x <= xinters
+            crossings ^= crossing
+
+        inside[candidates] = crossings
+        return inside
     
 class kVector(kLine):
     def __init__(self, width, height, *args, shape=None):
@@ -3157,6 +4492,8 @@ class kVector(kLine):
         return vertices
 
 class kList(kShape):
+    _stencilable = False  # the vertices are triangles already
+
     def __init__(self, the_list, width, height, *args, shape=None):
         super().__init__(shape)
         self.name = "kList"
@@ -3213,21 +4550,10 @@ class kList(kShape):
         pass
 
     def _generateVBO(self):
-        self._triangles = copy.deepcopy(self._vertices)
+        self._triangles = self._vertices
         self._vbo = -1
 
-        flattened_triangles = [coord for vertex in self._triangles for coord in vertex]
-        triangle_data = struct.pack(f'{len(flattened_triangles)}f', *flattened_triangles)
-
-        if self._vbo_triangle is not None:
-            glDeleteBuffers(1, [self._vbo_triangle])
-            self._vbo_triangle = None 
-        
-        self._vbo_triangle = glGenBuffers(1)
-
-        glBindBuffer(GL_ARRAY_BUFFER, self._vbo_triangle)
-        glBufferData(GL_ARRAY_BUFFER, len(triangle_data), triangle_data, GL_DYNAMIC_DRAW)
-        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self._vbo_triangle, self._vbo_triangle_size = self._uploadBuffer(self._vbo_triangle, self._vbo_triangle_size, self._triangles)
 
     def copy(self):
         kstore.scaleAnim(0)
@@ -3294,8 +4620,13 @@ class kList(kShape):
     def generateVertices(self):
         return copy.deepcopy(self._list)
 
+    def _localBounds(self):
+        return (0, 0, self._size[0], self._size[1])
+
     def contains(self, *point):
         x, y = toFloatList(point)
+        if not self._inBounds(x, y):
+            return False
         
         local_x = x - self._pos[0]
         local_y = y - self._pos[1]
@@ -3308,16 +4639,111 @@ class kList(kShape):
 
         return (0 <= rotated_x <= self._size[0]) and (0 <= rotated_y <= self._size[1])
 
+    def containsMany(self, points):
+        rotated_x, rotated_y = self._localPoints(toPointArray(points))
+        return (0 <= rotated_x) & (rotated_x <= self._size[0]) & (0 <= rotated_y) & (rotated_y <= self._size[1])
+
+
+class kTextMetrics:
+    """
+        measures texts with cached font metrics (per font and size) without rasterizing or uploading anything
+
+        the box of a text is its advance (including trailing spaces) times the height of its bounding rect
+    """
+    def __init__(self, max_sizes=4096):
+        self.fonts = {}  # {(font_name, font_size): (QFont, QFontMetrics, QFontMetricsF)}
+        self.sizes = kLRUCache(max_sizes)  # {(text, font_name, font_size): (width, height)}
+        self.advances = {}  # {(font_name, font_size, char): advance}
+
+    def font(self, font_name, font_size):
+        """
+            returns (QFont, QFontMetrics, QFontMetricsF) of the font at the integer font size
+        """
+        key = (font_name, int(font_size))
+        font = self.fonts.get(key)
+        if font is None:
+            qfont = QFont(font_name, int(font_size))
+            font = (qfont, QFontMetrics(qfont), QFontMetricsF(qfont))
+            self.fonts[key] = font
+        return font
+
+    def measure(self, text, font_name, font_size):
+        """
+            returns (width, height) of the text
+        """
+        if text == "\n":
+            text = " "
+
+        key = (text, font_name, int(font_size))
+        size = self.sizes.get(key)
+        if size is None:
+            _, metrics, _ = self.font(font_name, font_size)
+            size = (metrics.horizontalAdvance(text), metrics.boundingRect(text).height())
+            self.sizes.put(key, size)
+        return size
+
+    def measureMany(self, texts, font_name, font_size):
+        """
+            returns the widths and heights of many texts as two numpy arrays
+        """
+        sizes = np.array([self.measure(text, font_name, font_size) for text in texts], dtype=np.float64).reshape(-1, 2)
+        return sizes[:, 0], sizes[:, 1]
+
+    def advance(self, char, font_name, font_size):
+        key = (font_name, int(font_size), char)
+        advance = self.advances.get(key)
+        if advance is None:
+            _, _, metrics_f = self.font(font_name, font_size)
+            advance = metrics_f.horizontalAdvance(char)
+            self.advances[key] = advance
+        return advance
+
+    def offsets(self, text, font_name, font_size):
+        """
+            returns the x offset of every cursor position in the text (len(text) + 1 values, starting at 0)
+        """
+        advances = [self.advance(char, font_name, font_size) for char in text]
+        return np.concatenate([[0.0], np.cumsum(advances)])
+
+    def lineHeight(self, font_name, font_size):
+        """
+            returns the height of a line of text, which does not depend on the characters
+        """
+        _, metrics, _ = self.font(font_name, font_size)
+        return metrics.height()
+
+    def getStats(self):
+        return {"fonts": len(self.fonts), "advances": len(self.advances), "sizes": self.sizes.getStats()}
+
+text_metrics = kTextMetrics()
 
 class kWordBuffer:
-    def __init__(self):
-        self.buffer = {}  # Cache: {(word, font_name, font_size, font_color): texture_id}
+    """
+        textures of whole words (for the "displaylist" renderer), kept in an LRU cache with a byte budget
+
+        - generate and load use the same key: (word, font name, integer font size, color)
+        - textures in use by a text (acquire/release) are never evicted
+        - evicted textures are deleted with glDeleteTextures
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.buffer = OrderedDict()  # {(word, font_name, font_size, font_color): (texture_id, (width, height))}
+        self.references = {}  # {key: number of texts using the texture}
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
-    def generate(self, word, font, font_size, font_color):
+    def key(self, word, font_name, font_size, font_color):
         if word == "\n":
             word = " "
+        return (word, str(font_name), int(font_size), tuple(int(c) for c in font_color))
 
-        font = QFont(font, int(font_size))
+    def generate(self, word, font_name, font_size, font_color):
+        if word == "\n":
+            word = " "
+
+        font = QFont(font_name, int(font_size))
         metrics = QFontMetrics(font)
         rect = metrics.boundingRect(word)
         width = metrics.horizontalAdvance(word)  # Includes trailing spaces
@@ -3353,30 +4779,570 @@ class kWordBuffer:
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
         glBindTexture(GL_TEXTURE_2D, 0)
 
-        key = (word, font, font_size, tuple(font_color))
+        key = self.key(word, font_name, font_size, font_color)
+        if key in self.buffer:
+            self._delete(key)
         self.buffer[key] = (texture_id, (width, height))
+        self.bytes += width * height * 4
+        self._evict()
         return texture_id, (width, height)
 
     def load(self, word, font_name, font_size, font_color):
-        if word == "\n":
-            word = " "
-            
-        key = (word, font_name, font_size, tuple(font_color))
+        key = self.key(word, font_name, font_size, font_color)
         if key in self.buffer:
+            self.buffer.move_to_end(key)
+            self.hits += 1
             return self.buffer[key]
+
+        self.misses += 1
+        return self.generate(word, font_name, font_size, font_color)
+
+    def acquire(self, key):
+        """
+            keeps the texture of the key (see key()) until it is released
+        """
+        self.references[key] = self.references.get(key, 0) + 1
+
+    def release(self, key):
+        count = self.references.get(key, 0) - 1
+        if count > 0:
+            self.references[key] = count
         else:
-            return self.generate(word, font_name, font_size, font_color)
+            self.references.pop(key, None)
+            self._evict()
+
+    def _delete(self, key):
+        texture_id, (width, height) = self.buffer.pop(key)
+        glDeleteTextures([texture_id])
+        self.bytes -= width * height * 4
+
+    def _evict(self):
+        for key in list(self.buffer):
+            if self.bytes <= self.max_bytes:
+                break
+            if key in self.references:
+                continue
+            self._delete(key)
+            self.evictions += 1
+
+    def setMaxBytes(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def clear(self):
+        for key in list(self.buffer):
+            if key not in self.references:
+                self._delete(key)
+
+    def getStats(self):
+        return {
+            "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+            "textures": len(self.buffer), "in_use": len(self.references),
+            "bytes": self.bytes, "max_bytes": self.max_bytes,
+        }
 
 the_word_buffer = kWordBuffer()
 
+class kGlyphRun:
+    """
+        the quads of a laid out string, two triangles per glyph, centered like the text's box
+
+        - vertices is a (N,4) float32 array of local x/y and texture u/v, sorted by atlas page
+        - pages is a tuple of (page, first vertex, vertex count)
+        - sdf is True, if the pages hold distance fields instead of coverage (see setTextMode)
+    """
+    def __init__(self, vertices, pages, size, sdf=False):
+        self.vertices = vertices
+        self.pages = pages
+        self.size = size
+        self.sdf = sdf
+
+SDF_FONT_SIZE = 48  # the distance fields of all sizes are rasterized at this font size
+SDF_SPREAD = 6  # pixels, over which the distance field goes from inside to outside
+
+class kGlyphAtlas:
+    """
+        rasterizes every glyph once per font and size into shared alpha textures (pages)
+        and lays out strings as quads from the cached glyph metrics and advances
+
+        the glyphs are white: the font color is a vertex attribute, so changing it never rasterizes again
+
+        with setTextMode("sdf"), the pages hold signed distance fields instead: every glyph is rasterized once per font
+        at SDF_FONT_SIZE and all other sizes are the same quads scaled, so animating the font size rasterizes nothing
+    """
+    def __init__(self, page_size=1024, max_runs=2048):
+        self.page_size = page_size
+        self.padding = 2  # transparent pixels around every glyph, so that neighbours do not bleed in
+        self.glyphs = {}  # {(font_name, font_size, char): (page, u0, v0, u1, v1, x, y, width, height, advance)}
+        self.distance_fields = {}  # {(font_name, char): the same tuple at SDF_FONT_SIZE}
+        self.pages = []  # uint8 alpha images, uploaded by upload()
+        self.textures = []
+        self.dirty = set()
+        self.shelf = [0, 0, 0]  # x, y and height of the current row on the last page
+        self.runs = kLRUCache(max_runs)
+
+    def _allocate(self, width, height):
+        x, y, row_height = self.shelf
+        if self.pages and x + width > self.pages[-1].shape[1]:
+            x, y, row_height = 0, y + row_height, 0
+        if not self.pages or y + height > self.pages[-1].shape[0]:
+            # glyphs larger than a page get a page of their own
+            self.pages.append(np.zeros((max(self.page_size, height), max(self.page_size, width)), dtype=np.uint8))
+            x, y, row_height = 0, 0, 0
+
+        self.shelf = [x + width, y, max(row_height, height)]
+        return len(self.pages) - 1, x, y
+
+    def _rasterize(self, font_name, font_size, char, distance_field=False):
+        font, metrics, _ = text_metrics.font(font_name, font_size)
+        rect = metrics.boundingRect(char)
+        advance = text_metrics.advance(char, font_name, font_size)
+
+        if rect.width() <= 0 or rect.height() <= 0:
+            return (0, 0, 0, 0, 0, 0, 0, 0, 0, advance)
+
+        padding = SDF_SPREAD + 1 if distance_field else self.padding
+        width = rect.width() + 2 * padding
+        height = rect.height() + 2 * padding
+
+        image = QImage(width, height, QImage.Format_RGBA8888)
+        image.fill(Qt.transparent)
+
+        painter = QPainter(image)
+        painter.setFont(font)
+        painter.setPen(QColor(255, 255, 255))
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        painter.setRenderHint(QPainter.TextAntialiasing, True)
+        painter.drawText(padding - rect.x(), padding - rect.y(), char)
+        painter.end()
+
+        ptr = image.bits()
+        ptr.setsize(image.byteCount())
+        alpha = np.array(ptr).reshape((height, image.bytesPerLine() // 4, 4))[:, :width, 3]
+        if distance_field:
+            alpha = self._distanceField(alpha)
+
+        page, x, y = self._allocate(width, height)
+        self.pages[page][y:y + height, x:x + width] = alpha
+        self.dirty.add(page)
+
+        page_height, page_width = self.pages[page].shape
+        return (page, x / page_width, y / page_height, (x + width) / page_width, (y + height) / page_height,
+                rect.x() - padding, rect.y() - padding, width, height, advance)
+
+    def _distanceField(self, coverage):
+        # the distance of every pixel to the nearest pixel on the other side of the outline,
+        # found by comparing the image with itself shifted by every offset within the spread
+        spread = SDF_SPREAD
+        inside = coverage >= 128
+        height, width = inside.shape
+        padded = np.pad(inside, spread, constant_values=False)
+
+        to_inside = np.full(inside.shape, np.inf)
+        to_outside = np.full(inside.shape, np.inf)
+        for dy in range(-spread, spread + 1):
+            for dx in range(-spread, spread + 1):
+                distance = math.hypot(dx, dy)
+                if distance > spread or distance == 0:
+                    continue
+                shifted = padded[spread + dy:spread + dy + height, spread + dx:spread + dx + width]
+                np.minimum(to_inside, np.where(shifted, distance, np.inf), out=to_inside)
+                np.minimum(to_outside, np.where(shifted, np.inf, distance), out=to_outside)
+
+        # half a pixel to the outline, which lies between the two pixels,
+        # next to the outline the coverage tells more exactly where it passes
+        signed = np.where(inside, np.minimum(to_outside, spread) - 0.5, 0.5 - np.minimum(to_inside, spread))
+        signed = np.where(np.abs(signed) <= 0.5, coverage / 255 - 0.5, signed)
+        return np.clip(127.5 + signed * 127.5 / spread, 0, 255).astype(np.uint8)
+
+    def glyph(self, font_name, font_size, char):
+        """
+            returns (page, u0, v0, u1, v1, x, y, width, height, advance) of the glyph, which is rasterized on first use
+
+            x and y are the offsets of the glyph's top left corner from the pen position on the baseline (y down),
+            in "sdf" mode they are the distance field's metrics scaled to the font size
+        """
+        if kstore.text_mode == "sdf":
+            key = (font_name, char)
+            glyph = self.distance_fields.get(key)
+            if glyph is None:
+                glyph = self._rasterize(font_name, SDF_FONT_SIZE, char, distance_field=True)
+                self.distance_fields[key] = glyph
+            if font_size == SDF_FONT_SIZE:
+                return glyph
+            scale = font_size / SDF_FONT_SIZE
+            return glyph[:5] + tuple(value * scale for value in glyph[5:])
+
+        key = (font_name, font_size, char)
+        glyph = self.glyphs.get(key)
+        if glyph is None:
+            glyph = self._rasterize(font_name, font_size, char)
+            self.glyphs[key] = glyph
+        return glyph
+
+    def layout(self, text, font_name, font_size):
+        """
+            returns the kGlyphRun of the text, the glyphs are rasterized on first use
+        """
+        if text == "\n":
+            text = " "
+
+        if kstore.text_mode == "sdf":
+            # one layout at the size of the distance fields, every font size (also in between) just scales it
+            run = self._cachedLayout(text, font_name, SDF_FONT_SIZE, True)
+            if font_size == SDF_FONT_SIZE:
+                return run
+            scale = font_size / SDF_FONT_SIZE
+            vertices = run.vertices.copy()
+            vertices[:, :2] *= scale
+            vertices.flags.writeable = False
+            return kGlyphRun(vertices, run.pages, (run.size[0] * scale, run.size[1] * scale), sdf=True)
+
+        return self._cachedLayout(text, font_name, int(font_size), False)
+
+    def _cachedLayout(self, text, font_name, font_size, sdf):
+        key = (text, font_name, font_size, sdf)
+        run = self.runs.get(key)
+        if run is None:
+            run = self._layout(text, font_name, font_size)
+            self.runs.put(key, run)
+        return run
+
+    def margin(self, font_size):
+        """
+            returns the width of the empty border around the glyph quads at the font size
+        """
+        if kstore.text_mode == "sdf":
+            return (SDF_SPREAD + 1) * font_size / SDF_FONT_SIZE
+        return self.padding
+
+    def _layout(self, text, font_name, font_size):
+        _, metrics, _ = text_metrics.font(font_name, font_size)
+        width, height = text_metrics.measure(text, font_name, font_size)
+
+        # the pen starts where the word textures placed it: the bounding rect touches the top left corner
+        rect = metrics.boundingRect(text)
+        pen = -rect.x()
+        baseline = -rect.y()
+
+        placed = []
+        for char in text:
+            glyph = self.glyph(font_name, font_size, char)
+            if glyph[7] > 0:
+                placed.append((glyph, round(pen) - width / 2))
+            pen += glyph[9]
+
+        placed.sort(key=lambda item: item[0][0])
+        glyphs = [glyph for glyph, _ in placed]
+        vertices = self.quads(glyphs, [pen for _, pen in placed], np.full(len(placed), height / 2 - baseline)).reshape(-1, 4)
+        vertices.flags.writeable = False
+
+        pages = []
+        for i, glyph in enumerate(glyphs):
+            if pages and pages[-1][0] == glyph[0]:
+                pages[-1][2] += 6
+            else:
+                pages.append([glyph[0], 6 * i, 6])
+
+        return kGlyphRun(vertices, tuple(tuple(page) for page in pages), (width, height), sdf=kstore.text_mode == "sdf")
+
+    def quads(self, glyphs, pens, baselines):
+        """
+            returns the two triangles (x, y, u, v) of every glyph as a (N,6,4) float32 array,
+            the glyphs are placed at the pen positions on the baselines (y up)
+        """
+        glyphs = np.array(glyphs, dtype=np.float64).reshape(-1, 10)
+        left = np.asarray(pens, dtype=np.float64) + glyphs[:, 5]
+        top = np.asarray(baselines, dtype=np.float64) - glyphs[:, 6]
+
+        # (left, bottom, right, top) and (u0, v bottom, u1, v top) to the corners of two triangles
+        boxes = np.stack([left, top - glyphs[:, 8], left + glyphs[:, 7], top, glyphs[:, 1], glyphs[:, 4], glyphs[:, 3], glyphs[:, 2]], axis=1)
+        corners = np.array([[0, 1], [2, 1], [2, 3], [0, 1], [2, 3], [0, 3]])
+        vertices = np.empty((len(boxes), 6, 4), dtype=np.float32)
+        vertices[:, :, :2] = boxes[:, :4][:, corners]
+        vertices[:, :, 2:] = boxes[:, 4:][:, corners]
+        return vertices
+
+    def compose(self, parts):
+        """
+            returns one kGlyphRun of many runs, each moved by its offset: parts is a list of (run, x, y)
+        """
+        vertices = []
+        pages = []
+        sdf = kstore.text_mode == "sdf"
+        for run, x, y in parts:
+            if len(run.vertices) == 0:
+                continue
+            sdf = run.sdf
+            moved = run.vertices.copy()
+            moved[:, 0] += x
+            moved[:, 1] += y
+            vertices.append(moved)
+            pages.extend(np.full(count, page) for page, _, count in run.pages)
+
+        if not vertices:
+            return kGlyphRun(np.zeros((0, 4), dtype=np.float32), (), (0, 0), sdf)
+
+        vertices = np.concatenate(vertices)
+        pages = np.concatenate(pages)
+        order = np.argsort(pages, kind="stable")
+        vertices = vertices[order]
+        vertices.flags.writeable = False
+
+        page_numbers, firsts, counts = np.unique(pages[order], return_index=True, return_counts=True)
+        low = vertices[:, :2].min(axis=0)
+        high = vertices[:, :2].max(axis=0)
+
+        return kGlyphRun(vertices, tuple(zip(page_numbers.tolist(), firsts.tolist(), counts.tolist())), tuple((high - low).tolist()), sdf)
+
+    def upload(self):
+        """
+            uploads the pages with new glyphs to their textures (needs the OpenGL context)
+        """
+        if not self.dirty:
+            return
+
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        for page in sorted(self.dirty):
+            image = self.pages[page]
+            height, width = image.shape
+            if page < len(self.textures):
+                glBindTexture(GL_TEXTURE_2D, self.textures[page])
+                glTexSubImage2D(GL_TEXTURE_2D, 0, 0, 0, width, height, GL_ALPHA, GL_UNSIGNED_BYTE, image)
+            else:
+                texture_id = glGenTextures(1)
+                glBindTexture(GL_TEXTURE_2D, texture_id)
+                glTexImage2D(GL_TEXTURE_2D, 0, GL_ALPHA, width, height, 0, GL_ALPHA, GL_UNSIGNED_BYTE, image)
+                glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+                glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+                self.textures.append(texture_id)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 4)
+        self.dirty.clear()
+
+    def getStats(self):
+        return {"glyphs": len(self.glyphs), "distance_fields": len(self.distance_fields), "pages": len(self.pages), "runs": self.runs.getStats()}
+
+glyph_atlas = kGlyphAtlas()
+
+class kTextLayout:
+    """
+        tokens (words, single spaces and new lines) and line breaks of a label's text
+
+        - the tokens are measured once with text_metrics, the lines are wrapped greedily at max_width
+        - nothing is recomputed, unless the text, font, font size or width change
+        - after an edit, the lines before the first changed token are kept and only the rest is reflowed
+        - lines is a list of [first token, end token, width, height], version counts the changes
+    """
+    def __init__(self):
+        self.text = None
+        self.font_name = None
+        self.font_size = None
+        self.max_width = None
+        self.tokens = []
+        self.widths = np.zeros(0)
+        self.heights = np.zeros(0)
+        self.lines = []
+        self.version = 0
+
+    def _tokenize(self, text):
+        tokens = []
+        for line in text.split("\n"):
+            i = 0
+            while i < len(line):
+                if line[i] == " ":
+                    tokens.append(" ")
+                    i += 1
+                else:
+                    start = i
+                    while i < len(line) and line[i] != " ":
+                        i += 1
+                    tokens.append(line[start:i])
+            tokens.append("\n")
+
+        if tokens and tokens[-1] == "\n":
+            tokens.pop()
+        return tokens
+
+    def update(self, text, font_name, font_size, max_width):
+        """
+            returns True, if the lines have changed
+        """
+        font_size = int(font_size)
+        if (font_name, font_size, max_width) != (self.font_name, self.font_size, self.max_width):
+            first_token = 0
+            self.tokens = self._tokenize(text)
+            self.widths, self.heights = text_metrics.measureMany(self.tokens, font_name, font_size)
+        elif text != self.text:
+            tokens = self._tokenize(text)
+            first_token = 0
+            while first_token < min(len(tokens), len(self.tokens)) and tokens[first_token] == self.tokens[first_token]:
+                first_token += 1
+
+            widths, heights = text_metrics.measureMany(tokens[first_token:], font_name, font_size)
+            self.widths = np.concatenate([self.widths[:first_token], widths])
+            self.heights = np.concatenate([self.heights[:first_token], heights])
+            self.tokens = tokens
+        else:
+            return False
+
+        self.text = text
+        self.font_name = font_name
+        self.font_size = font_size
+        self.max_width = max_width
+
+        # a line is kept, if the token, which ended it, did not change
+        first_line = 0
+        while first_line < len(self.lines) and self.lines[first_line][1] < first_token:
+            first_line += 1
+        self._reflow(first_line)
+        self.version += 1
+        return True
+
+    def _reflow(self, first_line):
+        lines = self.lines[:first_line]
+        start = lines[-1][1] if lines else 0
+        current_width = 0
+
+        for i in range(start, len(self.tokens)):
+            if self.tokens[i] == "\n":
+                if i > start:
+                    lines.append([start, i, current_width, self.heights[start:i].max()])
+                start = i + 1
+                current_width = 0
+                continue
+
+            if current_width + self.widths[i] > self.max_width and i > start:
+                lines.append([start, i, current_width, self.heights[start:i].max()])
+                start = i
+                current_width = 0
+
+            current_width += self.widths[i]
+
+        if start < len(self.tokens):
+            lines.append([start, len(self.tokens), current_width, self.heights[start:].max()])
+
+        self.lines = lines
+
+class kGlyphLine:
+    """
+        a single line of text as one quad per character, which is edited in place (used by kInput)
+
+        - insert and delete only measure (and rasterize) the changed characters
+        - the quads are kept in an array with spare capacity: while typing, the number of vertices stays the same,
+          so the renderer rewrites the text's slot instead of rebuilding its buffers
+        - the pen advances by whole pixels, so that shifted glyphs stay sharp
+    """
+    def __init__(self, font_name, font_size):
+        self.font_name = font_name
+        self.font_size = int(font_size)
+        self.sdf = kstore.text_mode == "sdf"
+        self.text = ""
+        self.quads = np.zeros((16, 6, 4), dtype=np.float32)  # relative to the start of the baseline
+        self.advances = np.zeros(0)
+        self.extents = np.zeros((0, 2))  # top and bottom of every glyph's ink (y down), inf and -inf for spaces
+        self.pages = np.zeros(0, dtype=np.int64)  # -1 for glyphs without pixels
+        self.width = 0.0
+        self.version = 0
+
+    def insert(self, index, text):
+        if text == "":
+            return
+
+        count = len(text)
+        size = len(self.text)
+        glyphs = [glyph_atlas.glyph(self.font_name, self.font_size, char) for char in text]
+        advances = np.array([round(glyph[9]) for glyph in glyphs], dtype=np.float64)
+
+        if size + count > len(self.quads):
+            quads = np.zeros((max(size + count, 2 * len(self.quads)), 6, 4), dtype=np.float32)
+            quads[:size] = self.quads[:size]
+            self.quads = quads
+
+        # the glyphs after the insertion move right, the new ones are placed in the gap
+        shift = advances.sum()
+        self.quads[index + count:size + count] = self.quads[index:size]
+        self.quads[index + count:size + count, :, 0] += shift
+        pens = self.advances[:index].sum() + np.concatenate([[0.0], np.cumsum(advances)[:-1]])
+        self.quads[index:index + count] = glyph_atlas.quads(glyphs, pens, np.zeros(count))
+
+        padding = glyph_atlas.margin(self.font_size)
+        extents = [[glyph[6] + padding, glyph[6] + glyph[8] - padding] if glyph[7] > 0 else [np.inf, -np.inf] for glyph in glyphs]
+        self.advances = np.insert(self.advances, index, advances)
+        self.extents = np.insert(self.extents, index, extents, axis=0)
+        self.pages = np.insert(self.pages, index, [glyph[0] if glyph[7] > 0 else -1 for glyph in glyphs])
+
+        self.text = self.text[:index] + text + self.text[index:]
+        self.width += shift
+        self.version += 1
+
+    def delete(self, index, count=1):
+        count = min(count, len(self.text) - index)
+        if count <= 0:
+            return
+
+        size = len(self.text)
+        shift = self.advances[index:index + count].sum()
+        self.quads[index:size - count] = self.quads[index + count:size]
+        self.quads[index:size - count, :, 0] -= shift
+        self.quads[size - count:size] = 0
+
+        self.advances = np.delete(self.advances, np.s_[index:index + count])
+        self.extents = np.delete(self.extents, np.s_[index:index + count], axis=0)
+        self.pages = np.delete(self.pages, np.s_[index:index + count])
+
+        self.text = self.text[:index] + self.text[index + count:]
+        self.width -= shift
+        self.version += 1
+
+    def offset(self, index):
+        """
+            returns the x offset of the cursor position from the start of the line
+        """
+        return self.advances[:index].sum()
+
+    def extent(self):
+        """
+            returns the top and bottom of the ink (y down, relative to the baseline) or None for an empty line
+        """
+        if len(self.extents) == 0 or self.extents[:, 1].max() < self.extents[:, 0].min():
+            return None
+        return self.extents[:, 0].min(), self.extents[:, 1].max()
+
+    def run(self, x, y):
+        """
+            returns the kGlyphRun of the line, with the baseline starting at (x, y)
+        """
+        vertices = self.quads.reshape(-1, 4).copy()
+        vertices[:, 0] += x
+        vertices[:, 1] += y
+
+        used = np.unique(self.pages[self.pages >= 0])
+        if len(used) <= 1:
+            # spare quads and spaces are empty, they can go with any page
+            pages = ((int(used[0]) if len(used) else 0, 0, len(vertices)),)
+        else:
+            quad_pages = np.full(len(self.quads), used[0])
+            quad_pages[:len(self.pages)] = np.where(self.pages >= 0, self.pages, used[0])
+            order = np.argsort(quad_pages, kind="stable")
+            vertices = vertices.reshape(-1, 6, 4)[order].reshape(-1, 4)
+            page_numbers, firsts, counts = np.unique(quad_pages[order], return_index=True, return_counts=True)
+            pages = tuple(zip(page_numbers.tolist(), (6 * firsts).tolist(), (6 * counts).tolist()))
+
+        vertices.flags.writeable = False
+        extent = self.extent()
+        return kGlyphRun(vertices, pages, (self.width, extent[1] - extent[0] if extent else 0), self.sdf)
+
 class kText(kShape):
+    _texture_key = None  # the word texture held by the "displaylist" renderer
+
     def __init__(self, text):
         super().__init__()
 
         self.getText, self.setText = kValue(self, "text", text)
         self.getFont, self.setFont = kValue(self, "font", kstore.font)
         self.getFontSize, self.setFontSize = kNumber(self, "fontSize", kstore.fontSize)
-        self.getFontColor, self.setFontColor = kColor(self, "fontColor", kstore.fontColor)
+        self.getFontColor, self.setFontColor = kColor(self, "fontColor", kstore.fontColor, update=False, draw="_drawFontColor")
 
     def getWidth(self): 
         """
@@ -3397,7 +5363,7 @@ class kText(kShape):
         if self.text == "":
             return [0, 0]
 
-        self.texture_id, self.size = the_word_buffer.load(self._text, self.font, self.fontSize, self.fontColor)
+        self.size = text_metrics.measure(self.text, self.font, self.fontSize)
 
         return self.size
 
@@ -3452,12 +5418,8 @@ class kText(kShape):
 
     def _generateVertices(self):
         self._fillMode = GL_TRIANGLE_FAN
-        
-        if self._text == "":
-            self._texture_id = -1
-            self._size= [0,0]
-        else:
-            self._texture_id, self._size = the_word_buffer.load(self._text, self._font, self._fontSize, self._fontColor)
+        self._glyphs = glyph_atlas.layout(self._text, self._font, self._fontSize)
+        self._size = self._glyphs.size
 
         vertices = [
             [0, 0],
@@ -3473,7 +5435,7 @@ class kText(kShape):
         return vertices
 
     def generateVertices(self):
-        self.texture_id, self.size = the_word_buffer.load(self.text, self.font, self.fontSize, self.fontColor)
+        self.size = text_metrics.measure(self.text, self.font, self.fontSize)
 
         vertices = [
             [0, 0],
@@ -3495,6 +5457,11 @@ class kText(kShape):
         the_copy.show()
         return the_copy
 
+    def _localBounds(self):
+        # contains() tests against the box of the public size
+        size = self.getSize()
+        return (0, 0, size[0], size[1])
+
     def contains(self, x, y):
         local_x = x - self._pos[0]
         local_y = y - self._pos[1]
@@ -3505,11 +5472,64 @@ class kText(kShape):
         rotated_x = local_x * cos_theta + local_y * sin_theta + self._pivot[0]
         rotated_y = -local_x * sin_theta + local_y * cos_theta + self._pivot[1]
 
-        return (0 <= rotated_x <= self.width) and (0 <= rotated_y <= self.height)
+        width, height = self.getSize()
+        return (0 <= rotated_x <= width) and (0 <= rotated_y <= height)
+
+    def containsMany(self, points):
+        rotated_x, rotated_y = self._localPoints(toPointArray(points))
+        width, height = self.getSize()
+        return (0 <= rotated_x) & (rotated_x <= width) & (0 <= rotated_y) & (rotated_y <= height)
+
+    def _getMatrix(self):
+        # texts rotate around pos + pivot, see _draw
+        if self._matrix is None:
+            angle = math.radians(self._rot)
+            cos_theta = math.cos(angle)
+            sin_theta = math.sin(angle)
+            pivot_x, pivot_y = self._pivot[0], self._pivot[1]
+
+            self._matrix = np.array([
+                [cos_theta, -sin_theta, self._pos[0] + pivot_x - (cos_theta * pivot_x - sin_theta * pivot_y)],
+                [sin_theta, cos_theta, self._pos[1] + pivot_y - (sin_theta * pivot_x + cos_theta * pivot_y)],
+            ])
+        return self._matrix
+
+    def _drawFontColor(self):
+        # the glyphs in the atlas are white, the batch renderer only rewrites the vertex colors
+        if self._isBatched():
+            the_renderer.update(self)
+        else:
+            self._draw()
+
+    def _holdTexture(self, key):
+        if key == self._texture_key:
+            return
+        if key is not None:
+            the_word_buffer.acquire(key)
+        if self._texture_key is not None:
+            the_word_buffer.release(self._texture_key)
+        self._texture_key = key
+
+    def _remove(self):
+        super()._remove()
+        self._holdTexture(None)
 
     def _draw(self):
+        if self._isBatched():
+            self._holdTexture(None)
+            # the renderer rewrites the glyph quads in place, as long as their number stays the same
+            the_renderer.update(self)
+            return
+
         if not self._ready:
             return 
+
+        if self._text == "":
+            self._texture_id = -1
+            self._holdTexture(None)
+        else:
+            self._holdTexture(the_word_buffer.key(self._text, self._font, self._fontSize, self._fontColor))
+            self._texture_id, _ = the_word_buffer.load(self._text, self._font, self._fontSize, self._fontColor)
         
         if self._idGL is not None:
             glDeleteLists(self._idGL, 1)
@@ -3548,7 +5568,109 @@ class kText(kShape):
 
         self._idGL = idGL
 
+class kTextBlock(kText):
+    """
+        the laid out lines of a label as one glyph run, transformed like the label (see kLabel._drawText)
+    """
+    _getMatrix = kShape._getMatrix
+
+    def __init__(self):
+        super().__init__("")
+        self.name = "kTextBlock"
+        self._glyphs = glyph_atlas.compose([])
+
+    def _setGlyphs(self, run):
+        self._glyphs = run
+        self._vertices = self._generateVertices()
+        self._draw()
+
+    def _generateVertices(self):
+        self._fillMode = GL_TRIANGLE_FAN
+        if len(self._glyphs.vertices) == 0:
+            return []
+
+        low = self._glyphs.vertices[:, :2].min(axis=0).tolist()
+        high = self._glyphs.vertices[:, :2].max(axis=0).tolist()
+        return [[low[0], low[1]], [high[0], low[1]], [high[0], high[1]], [low[0], high[1]]]
+
+    def _draw(self):
+        if self._isBatched():
+            the_renderer.update(self)
+            return
+
+        if not self._ready:
+            return
+
+        if self._idGL is not None:
+            glDeleteLists(self._idGL, 1)
+            self._idGL = None
+
+        glyph_atlas.upload()
+        positions = np.ascontiguousarray(self._glyphs.vertices[:, :2])
+        texture_coordinates = np.ascontiguousarray(self._glyphs.vertices[:, 2:])
+
+        idGL = glGenLists(1)
+        glNewList(idGL, GL_COMPILE)
+        glPushMatrix()
+
+        glTranslatef(self._pos[0], self._pos[1], 0)
+        glRotatef(self._rot, 0, 0, 1)
+        glTranslatef(-self._pivot[0], -self._pivot[1], 0)
+
+        glEnable(GL_TEXTURE_2D)
+        glTexEnvf(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_MODULATE)
+        if self._glyphs.sdf:
+            # without the shader of the batch renderer, the distance field is cut at the outline
+            glTexEnvf(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_REPLACE)
+            glEnable(GL_ALPHA_TEST)
+            glAlphaFunc(GL_GEQUAL, 0.5)
+        glColor4ub(*list([int(c) for c in self._fontColor]))
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 0, positions)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glTexCoordPointer(2, GL_FLOAT, 0, texture_coordinates)
+
+        for page, first, count in self._glyphs.pages:
+            glBindTexture(GL_TEXTURE_2D, glyph_atlas.textures[page])
+            glDrawArrays(GL_TRIANGLES, first, count)
+
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glDisable(GL_ALPHA_TEST)
+        glDisable(GL_TEXTURE_2D)
+
+        glPopMatrix()
+        glEndList()
+
+        self._idGL = idGL
+
+class kFocusManager:
+    """
+        keeps the input, which has the focus: only this input gets the key events
+    """
+    def __init__(self):
+        self.focused = None
+
+    def focus(self, shape):
+        if self.focused is not None and self.focused is not shape:
+            self.focused._blur()
+        self.focused = shape
+
+    def blur(self, shape):
+        if self.focused is shape:
+            self.focused = None
+
+    def keyPress(self, event):
+        if self.focused is not None:
+            self.focused._keyPressEvent(event)
+
+focus_manager = kFocusManager()
+
 class kLabel(kRoundedRect):
+    _batchable = False
+    text_drawing = None
+
     def __init__(self, label="", text=""):
         super().__init__(200, 50, 15)
         self.name = "kLabel"
@@ -3595,7 +5717,10 @@ class kLabel(kRoundedRect):
             self.label_drawing = None
             
         kstore.scaleAnim(0)
-        self._words = []
+        self._layout = kTextLayout()
+        self._glyphs_key = None
+        self.text_drawing = kTextBlock()
+        self.text_drawing._ui = True
         self.setText(text)
         if label != "":
             self.label_drawing.show()
@@ -3615,89 +5740,14 @@ class kLabel(kRoundedRect):
         self.label_drawing.setText(str(label))
         kstore.unscaleAnim()
         
-    def _resetWords(self, new_tokens):
-        reused_words = []
-        old_words = self._words
-
-        for i, token in enumerate(new_tokens):
-            if i < len(old_words) and old_words[i].getText() == token:
-                reused_words.append(old_words[i])
-            else:
-                if i < len(old_words):
-                    old_words[i].remove()
-                word_drawing = drawText(token)
-                word_drawing.setFontSize(self._fontSize)
-                word_drawing.setFontColor(self._fontColor)
-                word_drawing.setRot(self._rot)
-                word_drawing._ui = True
-                reused_words.append(word_drawing)
-
-        # Remove any leftover old words
-        for word in old_words[len(new_tokens):]:
-            word.remove()
-
-        self._words = reused_words
-
-    def _initText(self):
-        tokens = []
-        lines = self._text.split("\n")
-
-        for line in lines:
-            i = 0
-            while i < len(line):
-                if line[i] == " ":
-                    space_count = 1
-                    while i + space_count < len(line) and line[i + space_count] == " ":
-                        space_count += 1
-                    tokens.extend([" "] * space_count)
-                    i += space_count
-                else:
-                    start = i
-                    while i < len(line) and line[i] != " ":
-                        i += 1
-                    tokens.append(line[start:i])
-            tokens.append("\n")
-
-        if tokens and tokens[-1] == "\n":
-            tokens.pop()
-
-        self._resetWords(tokens)
-
-    def _splitIntoLines(self):        
-        max_width = self._size[0] - 2 * self._padding
-        lines = []
-        current_line = []
-        current_width = 0
-        skip_space = True
-
-        for word in self._words:
-            if word.text == "\n":
-                if current_line:
-                    lines.append(current_line)
-                current_line = []
-                current_width = 0
-                skip_space = True
-                continue
-
-            if isinstance(word, str) and word == " " and skip_space:
-                continue  # skip leading space
-
-            word_width = word.getWidth()
-
-            if current_width + word_width > max_width and current_line:
-                lines.append(current_line)
-                current_line = []
-                current_width = 0
-                skip_space = True
-
-            current_line.append(word)
-            current_width += word_width
-            skip_space = False
-
-        if current_line:
-            lines.append(current_line)
-
-        self._lines = lines
+    def remove(self):
+        """
+            remove the label
+        """
+        super().remove()
+        self.text_drawing.remove()
+        if self.label_drawing is not None:
+            self.label_drawing.remove()
 
     def _draw(self):        
         super()._draw()
@@ -3715,67 +5765,81 @@ class kLabel(kRoundedRect):
         kstore.unscaleAnim()
 
     def _drawText(self):
-        kstore.pushImmediate()
-        kstore.scaleAnim(0)
+        if self.text_drawing is None:
+            return
+
+        # hovering or recoloring the label does not touch the layout
+        self._layout.update(self._text, self._font, self._fontSize, self._size[0] - 2 * self._padding)
+
+        key = (self._layout.version, self._alignX, self._alignY, self._size[0], self._size[1], self._padding, kstore.text_mode)
+        if key != self._glyphs_key:
+            self._glyphs_key = key
+            self.text_drawing._setGlyphs(self._layoutGlyphs())
+
+        self._placeTextDrawing()
 
-        self._initText()
-        self._splitIntoLines()
+    def _placeTextDrawing(self):
+        drawing = self.text_drawing
+        if list(drawing._pos) != list(self._pos):
+            drawing._setPos(list(self._pos))
+        if list(drawing._pivot) != list(self._pivot):
+            drawing._setPivot(list(self._pivot))
+        if drawing._rot != self._rot:
+            drawing._setRot(self._rot)
+        if list(drawing._fontColor) != list(self._fontColor):
+            drawing._setFontColor(list(self._fontColor))
+
+    def _layoutGlyphs(self):
+        """
+            returns the glyph run of the visible lines, relative to the label's position
+        """
+        layout = self._layout
         max_height = self._size[1] - 2 * self._padding
 
         visible_lines = []
         used_height = 0
 
-        for line in self._lines:
-            for word in line:
-                word.setFontColor(self._fontColor)
-                word.setFontSize(self._fontSize)
-                word.setFont(self._font)
-
-            line_height = max(word.getHeight() for word in line)
+        for line in layout.lines:
+            line_height = line[3]
             if used_height + line_height > max_height:
-                for word in line:
-                    word.hide()
                 continue
-            visible_lines.append((line, line_height))
+            visible_lines.append(line)
             used_height += line_height
 
         total_text_height = used_height
 
         # Compute vertical start position based on alignment
         if self._alignY == "top":
-            y = self._pos[1] + self._size[1] / 2 - self._padding
+            y = self._size[1] / 2 - self._padding
         elif self._alignY == "center":
-            y = self._pos[1] + total_text_height / 2
+            y = total_text_height / 2
         elif self._alignY == "bottom":
-            y = self._pos[1] - self._size[1] / 2 + self._padding
-        else:
-            y = self._pos[1] + self._size[1] / 2 - self._padding  # default to top
-
-        
-        for line, line_height in visible_lines:
-            line_width = sum(word.getWidth() for word in line)
+            y = -self._size[1] / 2 + self._padding
+        else:
+            y = self._size[1] / 2 - self._padding  # default to top
 
+        parts = []
+        for first, end, line_width, line_height in visible_lines:
             # Horizontal alignment
             if self._alignX == "left":
-                x = self._pos[0] - self._size[0] / 2 + self._padding
+                x = -self._size[0] / 2 + self._padding
             elif self._alignX == "center":
-                x = self._pos[0] - line_width / 2
+                x = -line_width / 2
             elif self._alignX == "right":
-                x = self._pos[0] + self._size[0] / 2 - self._padding - line_width
+                x = self._size[0] / 2 - self._padding - line_width
             else:
-                x = self._pos[0] - self._size[0] / 2 + self._padding
+                x = -self._size[0] / 2 + self._padding
 
             y -= line_height / 2  # move to center of line
 
-            for word in line:
-                word.setPos(x + word.getWidth() / 2, y)
-                word.show()
-                x += word.getWidth()
+            for i in range(first, end):
+                word_width = layout.widths[i]
+                parts.append((glyph_atlas.layout(layout.tokens[i], layout.font_name, layout.font_size), x + word_width / 2, y))
+                x += word_width
 
             y -= line_height / 2  # prepare for next line
 
-        kstore.unscaleAnim()
-        kstore.pullImmediate()
+        return glyph_atlas.compose(parts)
 
     def getText(self): 
         """
@@ -3928,6 +5992,9 @@ class kButton(kLabel):
         kstore.unscaleAnim()
 
 class kInput(kLabel):
+    _glyph_line = None  # kGlyphLine of the text, edited in place by _keyPressEvent
+    _cursor_line = None
+
     def __init__(self, label, handler=None):
         super().__init__(label, "")
         self.name = "kInput"
@@ -3953,14 +6020,15 @@ class kInput(kLabel):
         kstore.scaleAnim(0)
         kstore.pushImmediate()
         self._cursor_line = drawLine(0,1.5*self._fontSize)
-        self._cursor_line.setColor(self._fontColor)
+        # the cursor blinks by its alpha, so that the renderer only rewrites its color
+        self._cursor_line.setColor(list(self._fontColor[:3]) + [0])
         self._cursor_line._ui = True
-        self._cursor_line.hide()
         kstore.pullImmediate()
 
         kstore.unscaleAnim()
 
     def remove(self):
+        focus_manager.blur(self)
         super().remove()
         
     def _draw(self):
@@ -3971,6 +6039,7 @@ class kInput(kLabel):
 
     def _onUIClick(self, shape, x, y, button):
         self._focused = True
+        focus_manager.focus(self)
         self._cursor_position = len(str(self._text))
         
         kstore.scaleAnim(0)
@@ -4007,118 +6076,140 @@ class kInput(kLabel):
             self._onUIMouseEnter(shape, x,y)
         else:
             self._focused = False
+            focus_manager.blur(self)
             self._onUIMouseExit(shape, x,y)
 
+    def _blur(self):
+        # another input got the focus
+        self._focused = False
+        self._onUIMouseExit(self, 0, 0)
+
     def _emit(self):
         if self._handler:
             kstore.pushImmediate()
             self._handler(str(self._text))
             self._focused = False 
+            focus_manager.blur(self)
             kstore.scaleAnim(0)
             self.setFillColor(self._passiveColor)
             kstore.pullImmediate()
             kstore.unscaleAnim()
 
-    def _keyPressEvent(self, event):
-        key = event.key()
-
-        the_text = self._text 
-
-        if self._focused:
-            if key == Qt.Key_Return:
-                self._emit()
-            elif key == Qt.Key_Backspace:
-                if self._cursor_position > 0:
-                    the_text = the_text[:self._cursor_position - 1] + the_text[self._cursor_position:]
-                    self._cursor_position -= 1
-                    self._setText(the_text)
-                    self.text = the_text
-            elif key == Qt.Key_Delete:
-                if self._cursor_position < len(the_text):
-                    the_text = the_text[:self._cursor_position] + the_text[self._cursor_position + 1:]
-                    self._setText(the_text)
-                    self.text = the_text
-            elif key == Qt.Key_Left:
-                if self._cursor_position > 0:
-                    self._cursor_position -= 1
-            elif key == Qt.Key_Right:
-                if self._cursor_position < len(self._text):
-                    self._cursor_position += 1
-            else:  
-                new_text = the_text[:self._cursor_position] + event.text() + the_text[self._cursor_position:]
-
-                self._setText(new_text)
-                width = sum(word.getWidth() for word in self._words if isinstance(word, object))
-                
-                if width <= self._size[0] - 2 * self._padding:
-                    self.text = new_text
-                    self._cursor_position += 1
-                else:
-                    self._setText(the_text)    
+    def _drawText(self):
+        if self.text_drawing is None:
+            return
 
-        self._draw()
+        line = self._glyph_line
+        if (line is None or line.text != self._text or (line.font_name, line.font_size) != (self._font, int(self._fontSize))
+                or line.sdf != (kstore.text_mode == "sdf")):
+            line = kGlyphLine(self._font, self._fontSize)
+            line.insert(0, self._text)
+            self._glyph_line = line
+
+        key = (line.version, id(line), self._alignX, self._alignY, self._size[0], self._size[1], self._padding)
+        if key != self._glyphs_key:
+            self._glyphs_key = key
+            x, _, baseline, height = self._lineBox()
+            if height > self._size[1] - 2 * self._padding:
+                # like a label, a line which does not fit is not shown
+                self.text_drawing._setGlyphs(glyph_atlas.compose([]))
+            else:
+                self.text_drawing._setGlyphs(line.run(x, baseline))
 
-    def _drawCursor(self): 
-        if self._cursor_visible == 0 or not self._focused:
-            kstore.scaleAnim(0)
-            kstore.pushImmediate()
-            self._cursor_line.hide()
-            kstore.pullImmediate()
-            kstore.unscaleAnim()
-            return
+        self._placeTextDrawing()
 
-        if self._lines:
-            line_height = max(word.getHeight() for word in self._lines[0])
-            total_text_height = sum(max(word.getHeight() for word in l) for l in self._lines)
+    def _lineBox(self):
+        """
+            returns the start of the baseline, the bottom and the height of the line, relative to the input's position
+        """
+        line = self._glyph_line
+        extent = line.extent()
+        if extent is None:
+            _, height = text_metrics.measure("X", self._font, self._fontSize)
+            top, bottom = -height, 0
         else:
-            _, (_, line_height) = the_word_buffer.load("X", self._font, self._fontSize, self._fontColor)
-            total_text_height = line_height
+            top, bottom = extent
+        height = bottom - top
 
-        # Step 2: Calculate Y position
+        # Compute vertical position of the line's center based on alignment
         if self._alignY == "top":
-            y = self._pos[1] + self._size[1] / 2 - self._padding
-            y -= line_height
+            center = self._size[1] / 2 - self._padding - height / 2
         elif self._alignY == "center":
-            y = self._pos[1] + total_text_height / 2
-            y -= line_height
+            center = 0
         elif self._alignY == "bottom":
-            y = self._pos[1] - self._size[1] / 2 + self._padding
+            center = -self._size[1] / 2 + self._padding - height / 2
         else:
-            y = self._pos[1] + self._size[1] / 2 - self._padding
-    
-            y -= line_height
-
-        # Step 3: Calculate X position
-        line_width = 0
-        if self._text != "":
-            _, (line_width, _) = the_word_buffer.load(self._text, self._font, self._fontSize, self._fontColor)
+            center = self._size[1] / 2 - self._padding - height / 2
 
+        # Horizontal alignment
         if self._alignX == "left":
-            x = self._pos[0] - self._size[0] / 2 + self._padding
+            x = -self._size[0] / 2 + self._padding
         elif self._alignX == "center":
-            x = self._pos[0] - line_width / 2
+            x = -line.width / 2
         elif self._alignX == "right":
-            x = self._pos[0] + self._size[0] / 2 - self._padding - line_width
+            x = self._size[0] / 2 - self._padding - line.width
         else:
-            x = self._pos[0] - self._size[0] / 2 + self._padding
+            x = -self._size[0] / 2 + self._padding
 
-        chars = self._text[:self._cursor_position]
+        baseline = center + (top + bottom) / 2
+        return x, center - height / 2, baseline, height
 
-        char_width = 0
+    def _keyPressEvent(self, event):
+        key = event.key()
 
-        if chars != "" and len(chars) > 0:
-            _, (char_width, _) = the_word_buffer.load(chars, self._font, self._fontSize, self._fontColor)
-   
-        x += char_width
-        
-        # Step 5: Draw the cursor
-        kstore.pushImmediate()
-        kstore.scaleAnim(0)
-        self._cursor_line.setPos(x+1, y)
-        self._cursor_line.setColor(self._fontColor)
-        self._cursor_line.show()
-        kstore.pullImmediate()
-        kstore.unscaleAnim()
+        if not self._focused or self._glyph_line is None:
+            return
+
+        # edits go straight to the glyph line, only the changed quads and the cursor are updated
+        if key == Qt.Key_Return:
+            self._emit()
+        elif key == Qt.Key_Backspace:
+            if self._cursor_position > 0:
+                self._glyph_line.delete(self._cursor_position - 1)
+                self._cursor_position -= 1
+                self._editText()
+        elif key == Qt.Key_Delete:
+            if self._cursor_position < len(self._text):
+                self._glyph_line.delete(self._cursor_position)
+                self._editText()
+        elif key == Qt.Key_Left:
+            if self._cursor_position > 0:
+                self._cursor_position -= 1
+        elif key == Qt.Key_Right:
+            if self._cursor_position < len(self._text):
+                self._cursor_position += 1
+        else:  
+            text = event.text()
+            width = sum(round(text_metrics.advance(char, self._font, self._fontSize)) for char in text)
+
+            if text != "" and self._glyph_line.width + width <= self._size[0] - 2 * self._padding:
+                self._glyph_line.insert(self._cursor_position, text)
+                self._cursor_position += len(text)
+                self._editText()
+
+        self._drawCursor()
+
+    def _editText(self):
+        self._text = self._glyph_line.text
+        self.text = self._glyph_line.text
+        self._drawText()
+
+    def _drawCursor(self): 
+        if self._cursor_line is None or self._glyph_line is None:
+            return
+
+        color = list(self._fontColor)
+        if self._cursor_visible == 0 or not self._focused:
+            color[3] = 0
+
+        x, bottom, _, _ = self._lineBox()
+        x += self._glyph_line.offset(self._cursor_position)
+
+        cursor = self._cursor_line
+        if list(cursor._pos) != [self._pos[0] + x + 1, self._pos[1] + bottom]:
+            cursor._setPos([self._pos[0] + x + 1, self._pos[1] + bottom])
+        if list(cursor._lineColor) != color:
+            cursor._setColor(color)
 
 class kGrid:
     def __init__(self, width, dx, height, dy):
@@ -4205,6 +6296,754 @@ class kGrid:
 def debugCallback(*args, **kwargs):
     print('args = {0}, kwargs = {1}'.format(args, kwargs))
 
+MORPH_VERTEX_SHADER = """
+#version 120
+attribute vec2 begin_vertex;
+attribute vec2 end_vertex;
+
+uniform float fraction;
+uniform vec3 matrix_x;
+uniform vec3 matrix_y;
+
+void main() {
+    vec3 local = vec3(mix(begin_vertex, end_vertex, fraction), 1.0);
+    gl_Position = gl_ModelViewProjectionMatrix * vec4(dot(matrix_x, local), dot(matrix_y, local), 0.0, 1.0);
+}
+"""
+
+MORPH_FRAGMENT_SHADER = """
+#version 120
+uniform vec4 color;
+
+void main() {
+    gl_FragColor = color;
+}
+"""
+
+SDF_VERTEX_SHADER = """
+#version 120
+varying vec2 uv;
+
+void main() {
+    uv = gl_MultiTexCoord0.xy;
+    gl_FrontColor = gl_Color;
+    gl_Position = gl_ModelViewProjectionMatrix * gl_Vertex;
+}
+"""
+
+SDF_FRAGMENT_SHADER = """
+#version 120
+uniform sampler2D atlas;
+varying vec2 uv;
+
+void main() {
+    // the outline is at 0.5, smoothed over about one pixel on screen at any scale
+    float distance = texture2D(atlas, uv).a;
+    float width = max(fwidth(distance) * 0.7, 0.001);
+    float alpha = smoothstep(0.5 - width, 0.5 + width, distance);
+    gl_FragColor = vec4(gl_Color.rgb, gl_Color.a * alpha);
+}
+"""
+
+def beginStencilFill(rule):
+    """
+        the following polygon (drawn as a triangle fan) only marks its inside in the stencil buffer
+    """
+    glEnable(GL_STENCIL_TEST)
+    glColorMask(GL_FALSE, GL_FALSE, GL_FALSE, GL_FALSE)
+    glStencilMask(0xFF)
+    glStencilFunc(GL_ALWAYS, 0, 0xFF)
+    if rule == "nonzero":
+        glStencilOpSeparate(GL_FRONT, GL_KEEP, GL_KEEP, GL_INCR_WRAP)
+        glStencilOpSeparate(GL_BACK, GL_KEEP, GL_KEEP, GL_DECR_WRAP)
+    else:
+        glStencilOp(GL_KEEP, GL_KEEP, GL_INVERT)
+
+def coverStencilFill():
+    """
+        the following cover (e.g. the bounding box) is only drawn where the stencil buffer was marked, and clears the marks
+    """
+    glColorMask(GL_TRUE, GL_TRUE, GL_TRUE, GL_TRUE)
+    glStencilFunc(GL_NOTEQUAL, 0, 0xFF)
+    glStencilOp(GL_ZERO, GL_ZERO, GL_ZERO)
+
+def endStencilFill():
+    glDisable(GL_STENCIL_TEST)
+
+INSTANCE_VERTEX_SHADER = """
+#version 330
+layout(location = 0) in vec2 corner;
+layout(location = 1) in vec4 transform;   // offset x/y, rotation, primitive
+layout(location = 2) in vec4 geometry;    // half width/height, parameter, line width
+layout(location = 3) in vec4 fill_color;
+layout(location = 4) in vec4 line_color;
+
+uniform vec2 window_size;
+
+out vec2 local;
+flat out float primitive;
+flat out vec4 shape;
+flat out vec4 fill;
+flat out vec4 line;
+
+void main() {
+    primitive = transform.w;
+    shape = geometry;
+    fill = fill_color;
+    line = line_color;
+
+    if (geometry.x <= 0.0 || geometry.y <= 0.0) {
+        gl_Position = vec4(2.0, 2.0, 2.0, 1.0);
+        return;
+    }
+
+    local = corner * (geometry.xy + geometry.w * 0.5 + 1.0);
+    float c = cos(transform.z);
+    float s = sin(transform.z);
+    vec2 world = transform.xy + vec2(c * local.x - s * local.y, s * local.x + c * local.y);
+    gl_Position = vec4(world / window_size * 2.0 - 1.0, 0.0, 1.0);
+}
+"""
+
+INSTANCE_FRAGMENT_SHADER = """
+#version 330
+in vec2 local;
+flat in float primitive;
+flat in vec4 shape;
+flat in vec4 fill;
+flat in vec4 line;
+
+out vec4 color;
+
+float sdEllipse(vec2 p, vec2 ab) {
+    float k0 = length(p / ab);
+    float k1 = length(p / (ab * ab));
+    return k1 > 0.0 ? k0 * (k0 - 1.0) / k1 : -min(ab.x, ab.y);
+}
+
+float sdRoundedRect(vec2 p, vec2 half_size, float radius) {
+    vec2 q = abs(p) - half_size + radius;
+    return length(max(q, 0.0)) + min(max(q.x, q.y), 0.0) - radius;
+}
+
+float sdArc(vec2 p, float radius, float angle) {
+    float d = length(p) - radius;
+    if (angle < 0.0) {
+        p.y = -p.y;
+        angle = -angle;
+    }
+    if (angle >= 6.2831853) {
+        return d;
+    }
+
+    vec2 edge = vec2(cos(angle), sin(angle));
+    float wedge = min(length(p - vec2(max(p.x, 0.0), 0.0)), length(p - edge * max(dot(p, edge), 0.0)));
+    float phi = atan(p.y, p.x);
+    if (phi < 0.0) {
+        phi += 6.2831853;
+    }
+    if (phi <= angle) {
+        wedge = -wedge;
+    }
+    return max(d, wedge);
+}
+
+void main() {
+    int kind = int(primitive + 0.5);
+    float d;
+    if (kind == 0) {
+        d = sdEllipse(local, shape.xy);
+    } else if (kind == 1) {
+        d = sdRoundedRect(local, shape.xy, 0.0);
+    } else if (kind == 2) {
+        d = sdRoundedRect(local, shape.xy, shape.z);
+    } else {
+        d = sdArc(local, shape.x, shape.z);
+    }
+
+    float pixel = max(fwidth(d), 1e-4);
+    float fill_alpha = fill.a * clamp(0.5 - d / pixel, 0.0, 1.0);
+    float line_alpha = line.a * clamp((shape.w * 0.5 - abs(d)) / pixel + 0.5, 0.0, 1.0);
+    float alpha = line_alpha + fill_alpha * (1.0 - line_alpha);
+    if (alpha <= 0.0) {
+        discard;
+    }
+    color = vec4((line.rgb * line_alpha + fill.rgb * fill_alpha * (1.0 - line_alpha)) / alpha, alpha);
+}
+"""
+
+INSTANCE_SIZE = 16  # floats per instance, see kShape._instance
+
+class kBatchRenderer:
+    """
+        packs the geometry of all vertex based shapes into two large vertex buffers (positions and colors)
+        and draws them with one glDrawArrays call per run of triangles or lines
+
+        with the "instanced" renderer, circles, ellipses, rects, rounded rects and arcs are not turned into vertices at all:
+        every shape is one record in an instance buffer and a run of them is drawn with one glDrawArraysInstanced call
+        (a quad per shape, which a shader fills using the shape's signed distance function)
+
+        texts are quads textured from the glyph atlas in a buffer of their own,
+        a "text" (or "sdf") run keeps the atlas page where the other runs keep their shape
+    """
+    def __init__(self):
+        self.dirty = True
+        self.shape_count = -1
+        self.runs = []
+        self.vbo_positions = None
+        self.vbo_colors = None
+        self.capacity = 0
+        self.slots = {}
+        self.updates = set()
+
+        self.vbo_text = None
+        self.vbo_text_colors = None
+        self.text_capacity = 0
+        self.text_slots = {}
+
+        self.program = None
+        self.window_size_location = None
+        self.vbo_quad = None
+        self.vbo_instances = None
+        self.instance_capacity = 0
+        self.instance_data = np.zeros((0, INSTANCE_SIZE), dtype=np.float32)
+        self.instance_slots = {}
+
+        self.morph_program = None
+        self.morph_locations = {}
+        self.morph_supported = True
+
+        self.sdf_program = None
+        self.sdf_supported = True
+        self.garbage = []  # buffers, which are deleted while the context is current
+
+    def invalidate(self):
+        self.dirty = True
+
+    def update(self, shape):
+        """
+            the shape has moved or changed color: rewrite only its part of the buffers
+        """
+        self.updates.add(shape)
+
+    def _localGeometry(self, shape):
+        if not shape._batch_dirty and shape._batch_local is not None:
+            return shape._batch_local
+
+        vertices = np.asarray(shape._vertices, dtype=np.float32).reshape(-1, 2)
+        fill = vertices[:0]
+        line = vertices[:0]
+
+        if shape._fill:
+            if shape._getStencilRule() is not None and len(vertices) >= 3:
+                # the outline as a triangle fan, followed by its bounding box as cover
+                low = vertices.min(axis=0)
+                high = vertices.max(axis=0)
+                cover = np.array([[low[0], low[1]], [high[0], low[1]], [high[0], high[1]], [low[0], high[1]]], dtype=np.float32)
+                fill = np.concatenate([vertices, cover])
+            elif shape._fillMode == GL_TRIANGLE_FAN and len(vertices) >= 3:
+                count = len(vertices) - 2
+                indices = np.empty((count, 3), dtype=np.int32)
+                indices[:, 0] = 0
+                indices[:, 1] = np.arange(1, count + 1)
+                indices[:, 2] = np.arange(2, count + 2)
+                fill = vertices[indices.ravel()]
+            elif shape._fillMode == GL_TRIANGLES:
+                fill = np.asarray(shape._triangles, dtype=np.float32).reshape(-1, 2)
+                fill = fill[:len(fill) // 3 * 3]
+
+        if shape._line and len(vertices) >= 2:
+            line = np.stack([vertices, np.roll(vertices, -1, axis=0)], axis=1).reshape(-1, 2)
+
+        shape._batch_local = (fill, line)
+        shape._batch_world = None
+        shape._batch_dirty = False
+
+        return shape._batch_local
+
+    def _worldGeometry(self, shape):
+        fill, line = self._localGeometry(shape)
+
+        if shape._batch_world is None or shape._batch_world[0] is not shape._getMatrix():
+            matrix = shape._getMatrix()
+            rotation = matrix[:, :2].T
+            translation = matrix[:, 2]
+            shape._batch_world = (
+                matrix,
+                (fill @ rotation + translation).astype(np.float32),
+                (line @ rotation + translation).astype(np.float32),
+            )
+
+        return shape._batch_world[1], shape._batch_world[2]
+
+    def _textGeometry(self, shape):
+        run = shape._glyphs
+        matrix = shape._getMatrix()
+
+        if shape._batch_world is None or shape._batch_world[0] is not matrix or shape._batch_world[1] is not run:
+            vertices = run.vertices.copy()
+            vertices[:, :2] = run.vertices[:, :2] @ matrix[:, :2].T.astype(np.float32) + matrix[:, 2].astype(np.float32)
+            shape._batch_world = (matrix, run, vertices)
+
+        return shape._batch_world[2]
+
+    def _build(self):
+        positions = []
+        colors = []
+        runs = []
+        slots = {}
+        instances = []
+        instance_slots = {}
+        count = 0
+        text_vertices = []
+        text_colors = []
+        text_slots = {}
+        text_count = 0
+
+        def add(mode, points, color):
+            nonlocal count
+            if len(points) == 0:
+                return
+            if runs and runs[-1][0] == mode and mode not in ("evenodd", "nonzero"):
+                runs[-1][3] += len(points)
+            else:
+                runs.append([mode, None, count, len(points)])
+            positions.append(points)
+            colors.append(np.broadcast_to(color, (len(points), 4)))
+            count += len(points)
+
+        shapes = [shape for shape in shape_buffer if not shape._ui]
+        shapes += [shape for shape in shape_buffer if shape._ui]
+        if kstore.cursor is not None:
+            shapes.append(kstore.cursor)
+
+        for shape in shapes:
+            if not shape._ready:
+                continue
+
+            if not shape._batchable:
+                runs.append([None, shape, 0, 0])
+                continue
+
+            if shape._glyphs is not None:
+                vertices = self._textGeometry(shape)
+                mode = "sdf" if shape._glyphs.sdf else "text"
+                for page, first, page_count in shape._glyphs.pages:
+                    if runs and runs[-1][0] == mode and runs[-1][1] == page:
+                        runs[-1][3] += page_count
+                    else:
+                        runs.append([mode, page, text_count + first, page_count])
+                text_slots[shape] = (text_count, len(vertices), (shape._glyphs.sdf, shape._glyphs.pages))
+                text_vertices.append(vertices)
+                text_colors.append(np.broadcast_to(np.array(shape._fontColor, dtype=np.uint8), (len(vertices), 4)))
+                text_count += len(vertices)
+                continue
+
+            if shape._morph is not None:
+                runs.append(["morph", shape, 0, 0])
+                continue
+
+            if shape._isInstanced():
+                if runs and runs[-1][0] == "instances":
+                    runs[-1][3] += 1
+                else:
+                    runs.append(["instances", None, len(instances), 1])
+                instance_slots[shape] = len(instances)
+                instances.append(shape._instance())
+                continue
+
+            if shape._vbo is None:
+                continue
+
+            fill, line = self._worldGeometry(shape)
+            fill_offset = count
+            add(shape._getStencilRule() or GL_TRIANGLES, fill, np.array(shape._fillColor, dtype=np.uint8))
+            line_offset = count
+            add(GL_LINES, line, np.array(shape._lineColor, dtype=np.uint8))
+            slots[shape] = (fill_offset, len(fill), line_offset, len(line))
+
+        if count > 0:
+            self._upload(np.concatenate(positions), np.concatenate(colors))
+
+        if text_count > 0:
+            self._uploadText(np.concatenate(text_vertices), np.concatenate(text_colors))
+
+        self.instance_data = np.array(instances, dtype=np.float32).reshape(-1, INSTANCE_SIZE)
+        if len(instances) > 0:
+            self._uploadInstances()
+
+        self.runs = runs
+        self.slots = slots
+        self.instance_slots = instance_slots
+        self.text_slots = text_slots
+        self.updates.clear()
+        self.shape_count = len(shape_buffer)
+        self.dirty = False
+
+    def _applyUpdates(self):
+        for shape in self.updates:
+            if shape._morph is not None:
+                # morphs read their transform and colors when they are drawn
+                continue
+            if shape._glyphs is not None:
+                # texts, which appeared, disappeared or got glyphs on other pages need a new layout
+                slot = self.text_slots.get(shape)
+                if (slot is not None) != bool(shape._ready) or (slot is not None and slot[2] != (shape._glyphs.sdf, shape._glyphs.pages)):
+                    self._build()
+                    return
+                continue
+            # shapes, which appeared, disappeared or switched between instances and vertices need a new layout
+            slots = self.instance_slots if shape._isInstanced() else self.slots
+            if (shape in slots) != bool(shape._ready and (shape._vbo is not None or shape._isInstanced())):
+                self._build()
+                return
+
+        changed = [shape for shape in self.updates if shape in self.instance_slots]
+        for shape in changed:
+            self.instance_data[self.instance_slots[shape]] = shape._instance()
+
+        if len(changed) > 64:
+            self._uploadInstances()
+        elif changed:
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo_instances)
+            for shape in changed:
+                row = self.instance_slots[shape]
+                glBufferSubData(GL_ARRAY_BUFFER, row * INSTANCE_SIZE * 4, INSTANCE_SIZE * 4, self.instance_data[row])
+
+        for shape in self.updates:
+            if shape not in self.slots:
+                continue
+
+            fill_offset, fill_count, line_offset, line_count = self.slots[shape]
+            fill, line = self._worldGeometry(shape)
+
+            for offset, count, points, color in ((fill_offset, fill_count, fill, shape._fillColor), (line_offset, line_count, line, shape._lineColor)):
+                if count == 0:
+                    continue
+                glBindBuffer(GL_ARRAY_BUFFER, self.vbo_positions)
+                glBufferSubData(GL_ARRAY_BUFFER, offset * 2 * 4, points.nbytes, points)
+                colors = np.empty((count, 4), dtype=np.uint8)
+                colors[:] = np.array(color, dtype=np.uint8)
+                glBindBuffer(GL_ARRAY_BUFFER, self.vbo_colors)
+                glBufferSubData(GL_ARRAY_BUFFER, offset * 4, colors.nbytes, colors)
+
+        for shape in self.updates:
+            if shape not in self.text_slots or self.text_slots[shape][1] == 0:
+                continue
+
+            first, count, _ = self.text_slots[shape]
+            vertices = self._textGeometry(shape)
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo_text)
+            glBufferSubData(GL_ARRAY_BUFFER, first * 4 * 4, vertices.nbytes, vertices)
+            colors = np.empty((count, 4), dtype=np.uint8)
+            colors[:] = np.array(shape._fontColor, dtype=np.uint8)
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo_text_colors)
+            glBufferSubData(GL_ARRAY_BUFFER, first * 4, colors.nbytes, colors)
+
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.updates.clear()
+
+    def _upload(self, positions, colors):
+        if self.vbo_positions is None:
+            self.vbo_positions, self.vbo_colors = glGenBuffers(2)
+
+        if len(positions) > self.capacity:
+            self.capacity = max(len(positions), 2 * self.capacity)
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo_positions)
+            glBufferData(GL_ARRAY_BUFFER, self.capacity * 2 * 4, None, GL_DYNAMIC_DRAW)
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo_colors)
+            glBufferData(GL_ARRAY_BUFFER, self.capacity * 4, None, GL_DYNAMIC_DRAW)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo_positions)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, positions.nbytes, positions)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo_colors)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, colors.nbytes, colors)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def _uploadText(self, vertices, colors):
+        if self.vbo_text is None:
+            self.vbo_text, self.vbo_text_colors = glGenBuffers(2)
+
+        if len(vertices) > self.text_capacity:
+            self.text_capacity = max(len(vertices), 2 * self.text_capacity)
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo_text)
+            glBufferData(GL_ARRAY_BUFFER, self.text_capacity * 4 * 4, None, GL_DYNAMIC_DRAW)
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo_text_colors)
+            glBufferData(GL_ARRAY_BUFFER, self.text_capacity * 4, None, GL_DYNAMIC_DRAW)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo_text)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, vertices.nbytes, vertices)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo_text_colors)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, colors.nbytes, colors)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def _uploadInstances(self):
+        if self.vbo_instances is None:
+            self.vbo_instances = glGenBuffers(1)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo_instances)
+        if len(self.instance_data) > self.instance_capacity:
+            self.instance_capacity = max(len(self.instance_data), 2 * self.instance_capacity)
+            glBufferData(GL_ARRAY_BUFFER, self.instance_capacity * INSTANCE_SIZE * 4, None, GL_DYNAMIC_DRAW)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, self.instance_data.nbytes, self.instance_data)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def _compileShader(self, source, shader_type):
+        shader = glCreateShader(shader_type)
+        glShaderSource(shader, source)
+        glCompileShader(shader)
+        if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+            raise RuntimeError(glGetShaderInfoLog(shader).decode())
+        return shader
+
+    def _linkProgram(self, vertex_source, fragment_source, attributes=()):
+        vertex_shader = self._compileShader(vertex_source, GL_VERTEX_SHADER)
+        fragment_shader = self._compileShader(fragment_source, GL_FRAGMENT_SHADER)
+
+        program = glCreateProgram()
+        glAttachShader(program, vertex_shader)
+        glAttachShader(program, fragment_shader)
+        for location, attribute in enumerate(attributes):
+            glBindAttribLocation(program, location, attribute)
+        glLinkProgram(program)
+        glDeleteShader(vertex_shader)
+        glDeleteShader(fragment_shader)
+        if not glGetProgramiv(program, GL_LINK_STATUS):
+            raise RuntimeError(glGetProgramInfoLog(program).decode())
+
+        return program
+
+    def _createProgram(self):
+        program = self._linkProgram(INSTANCE_VERTEX_SHADER, INSTANCE_FRAGMENT_SHADER)
+
+        self.program = program
+        self.window_size_location = glGetUniformLocation(program, "window_size")
+
+        quad = np.array([[-1, -1], [1, -1], [-1, 1], [1, 1]], dtype=np.float32)
+        self.vbo_quad = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo_quad)
+        glBufferData(GL_ARRAY_BUFFER, quad.nbytes, quad, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def _prepareInstancing(self):
+        if self.program is not None:
+            return
+
+        try:
+            if not bool(glDrawArraysInstanced) or not bool(glVertexAttribDivisor):
+                raise RuntimeError("OpenGL 3.3 is required")
+            self._createProgram()
+        except Exception as error:
+            print("")
+            print(" > instanced rendering is not available: " + str(error).strip())
+            print(" > falling back to setRenderer(\"batch\")")
+            print("")
+            setRenderer("batch")
+
+    def _prepareMorphing(self):
+        if self.morph_program is None and self.morph_supported:
+            try:
+                program = self._linkProgram(MORPH_VERTEX_SHADER, MORPH_FRAGMENT_SHADER, ("begin_vertex", "end_vertex"))
+                self.morph_locations = {name: glGetUniformLocation(program, name) for name in ("fraction", "matrix_x", "matrix_y", "color")}
+                self.morph_program = program
+            except Exception as error:
+                print("")
+                print(" > morphing on the graphics card is not available: " + str(error).strip())
+                print("")
+                self.morph_supported = False
+
+        return self.morph_supported
+
+    def _drawMorph(self, shape):
+        if not self._prepareMorphing():
+            return
+
+        morph = shape._morph
+        count = len(morph.begin)
+
+        if morph.vbo is None:
+            # begin, end and the cover of the stencil fill are uploaded once per morph
+            x0, y0, x1, y1 = morph.box
+            cover = np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=np.float32)
+
+            data = np.empty((count + 4, 4), dtype=np.float32)
+            data[:count, :2] = morph.begin
+            data[:count, 2:] = morph.end
+            data[count:, :2] = cover
+            data[count:, 2:] = cover
+
+            morph.vbo = glGenBuffers(1)
+            glBindBuffer(GL_ARRAY_BUFFER, morph.vbo)
+            glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STATIC_DRAW)
+
+        matrix = shape._getMatrix()
+        glUseProgram(self.morph_program)
+        glUniform1f(self.morph_locations["fraction"], morph.fraction)
+        glUniform3f(self.morph_locations["matrix_x"], *matrix[0])
+        glUniform3f(self.morph_locations["matrix_y"], *matrix[1])
+
+        glBindBuffer(GL_ARRAY_BUFFER, morph.vbo)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, 16, None)
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, 16, ctypes.c_void_p(8))
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        if shape._fill and count >= 3:
+            glUniform4f(self.morph_locations["color"], *[c/255 for c in shape._fillColor])
+            beginStencilFill("nonzero" if shape._fillRule == "nonzero" else "evenodd")
+            glDrawArrays(GL_TRIANGLE_FAN, 0, count)
+            coverStencilFill()
+            glDrawArrays(GL_TRIANGLE_FAN, count, 4)
+            endStencilFill()
+
+        if shape._line and count >= 2:
+            glUniform4f(self.morph_locations["color"], *[c/255 for c in shape._lineColor])
+            glDrawArrays(GL_LINE_LOOP, 0, count)
+
+        glDisableVertexAttribArray(1)
+        glDisableVertexAttribArray(0)
+        glUseProgram(0)
+
+    def _drawInstances(self, first, count):
+        glUseProgram(self.program)
+        glUniform2f(self.window_size_location, kstore.size[0], kstore.size[1])
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo_quad)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, 0, None)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo_instances)
+        for i in range(4):
+            glEnableVertexAttribArray(i + 1)
+            glVertexAttribPointer(i + 1, 4, GL_FLOAT, GL_FALSE, INSTANCE_SIZE * 4, ctypes.c_void_p((first * INSTANCE_SIZE + 4 * i) * 4))
+            glVertexAttribDivisor(i + 1, 1)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        glDrawArraysInstanced(GL_TRIANGLE_STRIP, 0, 4, count)
+
+        for i in range(4):
+            glVertexAttribDivisor(i + 1, 0)
+            glDisableVertexAttribArray(i + 1)
+        glDisableVertexAttribArray(0)
+        glUseProgram(0)
+
+    def _prepareSDF(self):
+        if self.sdf_program is None and self.sdf_supported:
+            try:
+                program = self._linkProgram(SDF_VERTEX_SHADER, SDF_FRAGMENT_SHADER)
+                glUseProgram(program)
+                glUniform1i(glGetUniformLocation(program, "atlas"), 0)
+                glUseProgram(0)
+                self.sdf_program = program
+            except Exception as error:
+                print("")
+                print(" > smooth distance field text is not available: " + str(error).strip())
+                print("")
+                self.sdf_supported = False
+
+        return self.sdf_supported
+
+    def _drawText(self, page, first, count, sdf=False):
+        glEnable(GL_TEXTURE_2D)
+        glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_MODULATE)  # white glyphs times the vertex color
+        glBindTexture(GL_TEXTURE_2D, glyph_atlas.textures[page])
+        if sdf:
+            if self._prepareSDF():
+                glUseProgram(self.sdf_program)
+            else:
+                # the distance field cut at the outline, without smoothing
+                glEnable(GL_ALPHA_TEST)
+                glAlphaFunc(GL_GEQUAL, 0.5)
+                glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_REPLACE)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo_text)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 16, None)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glTexCoordPointer(2, GL_FLOAT, 16, ctypes.c_void_p(8))
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo_text_colors)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glColorPointer(4, GL_UNSIGNED_BYTE, 0, None)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        glDrawArrays(GL_TRIANGLES, first, count)
+
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        if sdf:
+            glUseProgram(0)
+            glDisable(GL_ALPHA_TEST)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glDisable(GL_TEXTURE_2D)
+
+    def _bindArrays(self):
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo_positions)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 0, None)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo_colors)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glColorPointer(4, GL_UNSIGNED_BYTE, 0, None)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def _unbindArrays(self):
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+    def draw(self):
+        if self.garbage:
+            glDeleteBuffers(len(self.garbage), self.garbage)
+            self.garbage = []
+
+        if kstore.renderer == "instanced":
+            self._prepareInstancing()
+
+        if self.dirty or self.shape_count != len(shape_buffer):
+            self._build()
+        elif self.updates:
+            self._applyUpdates()
+
+        glyph_atlas.upload()
+
+        bound = False
+        for mode, shape, first, count in self.runs:
+            if mode in ("text", "sdf"):
+                if bound:
+                    self._unbindArrays()
+                    bound = False
+                self._drawText(shape, first, count, mode == "sdf")
+            elif shape is not None or mode == "instances":
+                if bound:
+                    self._unbindArrays()
+                    bound = False
+                if mode == "morph":
+                    self._drawMorph(shape)
+                elif shape is not None:
+                    # textured shapes keep their display lists
+                    shape._drawGL()
+                else:
+                    self._drawInstances(first, count)
+            else:
+                if not bound:
+                    self._bindArrays()
+                    bound = True
+                if mode in ("evenodd", "nonzero"):
+                    beginStencilFill(mode)
+                    glDrawArrays(GL_TRIANGLE_FAN, first, count - 4)
+                    coverStencilFill()
+                    glDrawArrays(GL_TRIANGLE_FAN, first + count - 4, 4)
+                    endStencilFill()
+                else:
+                    glDrawArrays(mode, first, count)
+
+        if bound:
+            self._unbindArrays()
+
+        printErrorGL()
+
+the_renderer = kBatchRenderer()
+
 class kMainWindow(QOpenGLWidget):
     def __init__(self, width, height):
         super().__init__()
@@ -4227,9 +7066,14 @@ class kMainWindow(QOpenGLWidget):
         self.button_store = set()
         self.setMouseTracking(True)
         self.mouse_pos = [0,0]
+        self.hovered = set()  # shapes with _mouse_over, which get their exit event from mouseMoveEvent
+        self.pending_move = None  # the latest mouse position, which is dispatched with the next frame ("frame" mode)
+        self.pressed_shapes = {}  # {button: shapes under the mouse, when the button was pressed}
+        self.mouse_move_stats = {"events": 0, "dispatched": 0, "coalesced": 0, "throttled": 0}
 
         format = QSurfaceFormat()
         format.setSamples(4)
+        format.setStencilBufferSize(8)  # stencil-then-cover polygon fill
         format.setSwapBehavior(QSurfaceFormat.DoubleBuffer)
         format.setAlphaBufferSize(8)  # Request an 8-bit alpha channel
         self.setFormat(format)
@@ -4347,16 +7191,19 @@ class kMainWindow(QOpenGLWidget):
 
         glLoadIdentity()
         glTranslated(0, 0, 0)
-        for shape in shape_buffer:
-            if shape._drawGL is not None and not shape._ui:
-                shape._drawGL()
+        if kstore.renderer in ("batch", "instanced"):
+            the_renderer.draw()
+        else:
+            for shape in shape_buffer:
+                if shape._drawGL is not None and not shape._ui:
+                    shape._drawGL()
 
-        for shape in shape_buffer:
-            if shape._drawGL is not None and shape._ui:
-                shape._drawGL()
+            for shape in shape_buffer:
+                if shape._drawGL is not None and shape._ui:
+                    shape._drawGL()
 
-        if kstore.cursor is not None:
-            kstore.cursor._drawGL()
+            if kstore.cursor is not None:
+                kstore.cursor._drawGL()
 
         self.updateFps()
 
@@ -4373,7 +7220,7 @@ class kMainWindow(QOpenGLWidget):
 
     def clearGL(self):
         glClearColor(*kstore.backgroundColor)
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT | GL_STENCIL_BUFFER_BIT)
 
         glLoadIdentity()
         glTranslated(0, 0, 0)
@@ -4544,12 +7391,10 @@ class kMainWindow(QOpenGLWidget):
             self.close()
         
         key_text = event.text()
-        for shape in shape_buffer:
-            if hasattr(shape, "_keyPressEvent"):
-                shape._keyPressEvent(event)
+        focus_manager.keyPress(event)
 
         self.key_store.add(key_text)
-        for handler in on_key_pressed_handlers:
+        for handler in on_key_pressed_handlers.get(key_text):
             handler[0](key_text)
 
     def keyReleaseEvent(self, event):
@@ -4560,9 +7405,8 @@ class kMainWindow(QOpenGLWidget):
         if key_text in self.key_store:
             self.key_store.remove(key_text)
         
-        for handler in on_key_released_handlers:
-            if handler[1] == key_text or handler[1] == None:
-                handler[0](key_text)
+        for handler in on_key_released_handlers.get(key_text):
+            handler[0](key_text)
 
     def isKeyPressed(self, key):
         return key in self.key_store
@@ -4585,14 +7429,18 @@ class kMainWindow(QOpenGLWidget):
         pos = event.pos()
         pos = self.translateMousePos([pos.x(), pos.y()])
 
-        for shape in shape_buffer:
-            if shape._onMousePress and shape.contains(*pos):
-                kstore.pushImmediate()
-                shape._onMousePress(shape, *pos, button_text)
-                kstore.pullImmediate() 
+        pressed = []
+        for shape in hit_grid.query(*pos):
+            if (shape._onMousePress or shape._onMouseRelease) and shape.contains(*pos):
+                pressed.append(shape)
+                if shape._onMousePress:
+                    kstore.pushImmediate()
+                    shape._onMousePress(shape, *pos, button_text)
+                    kstore.pullImmediate() 
+        self.pressed_shapes[button_text] = pressed
 
         self.button_store.add(button_text)
-        for handler in on_mouse_pressed_handlers:
+        for handler in on_mouse_pressed_handlers.get(button_text):
             kstore.pushImmediate()
             handler[0](*pos, button_text)
             kstore.pullImmediate()
@@ -4605,15 +7453,20 @@ class kMainWindow(QOpenGLWidget):
         x = pos[0]
         y = pos[1]
 
-        for shape in shape_buffer:
-            if shape._onMouseRelease:
-               
+        # the shapes, which were pressed, those under the mouse and the focused input (which loses the focus)
+        shapes = set(self.pressed_shapes.pop(button_text, ()))
+        shapes.update(shape for shape in hit_grid.query(x, y) if shape._onMouseRelease and shape.contains(x, y))
+        if focus_manager.focused is not None:
+            shapes.add(focus_manager.focused)
+
+        for shape in sorted(shapes, key=lambda shape: shape.id):
+            if shape._onMouseRelease and shape in hit_grid.shapes:
                 kstore.pushImmediate()
                 shape._onMouseRelease(shape, x, y, button_text)
                 kstore.pullImmediate()
 
-        self.button_store.remove(button_text)
-        for handler in on_mouse_released_handlers:
+        self.button_store.discard(button_text)
+        for handler in on_mouse_released_handlers.get(button_text):
             kstore.pushImmediate()
             handler[0](x, y, button_text)
             kstore.pullImmediate()
@@ -4628,32 +7481,80 @@ class kMainWindow(QOpenGLWidget):
     def mouseMoveEvent(self, event):    
         pos = event.pos()
         pos = self.translateMousePos([pos.x(), pos.y()])
+        self.mouse_pos = pos 
+        self.mouse_move_stats["events"] += 1
+
+        if kstore.mouse_move_mode == "frame":
+            # only the latest position is dispatched, see flushMouseMoves
+            if self.pending_move is not None:
+                self.mouse_move_stats["coalesced"] += 1
+            self.pending_move = pos
+            return
+
+        self.dispatchMouseMove(pos)
+
+    def flushMouseMoves(self):
+        """
+            dispatches the mouse move, which is pending since the last frame, and the moves held back from throttled handlers
+        """
+        if self.pending_move is not None:
+            pos = self.pending_move
+            self.pending_move = None
+            self.dispatchMouseMove(pos)
+
+        now = kstore.elapsed_timer.elapsed()
+        for handler in on_mouse_moved_handlers.get():
+            throttle = handler[2]
+            if throttle is not None and throttle[2] is not None and now - throttle[1] >= throttle[0]:
+                x, y = throttle[2]
+                throttle[1] = now
+                throttle[2] = None
+                handler[0](x, y)  # submit of onMouseMove pushes and pulls the immediate mode
+
+    def dispatchMouseMove(self, pos):
         x = pos[0]
         y = pos[1]
-        self.mouse_pos = pos 
+        self.mouse_move_stats["dispatched"] += 1
 
-        for shape in shape_buffer:
+        # the shapes under the mouse and those, which the mouse may have left
+        shapes = hit_grid.query(*pos)
+        self.hovered.intersection_update(hit_grid.shapes)  # forget removed shapes
+        hovered = [shape for shape in self.hovered if shape not in shapes]
+        if hovered:
+            shapes = sorted(shapes + hovered, key=lambda shape: shape.id)
+
+        for shape in shapes:
             if not shape._onMouseEnter and not shape._onMouseExit:
                 continue 
 
             contains = shape.contains(*pos)
             if contains and not shape._mouse_over:
                 shape._mouse_over = True 
+                self.hovered.add(shape)
                 if shape._onMouseEnter is not None:
                     kstore.pushImmediate()
                     shape._onMouseEnter(shape, x,y)
                     kstore.pullImmediate()
             elif not contains and shape._mouse_over:
                 shape._mouse_over = False 
+                self.hovered.discard(shape)
                 if shape._onMouseExit is not None:
                     kstore.pushImmediate()
                     shape._onMouseExit(shape, x,y)
                     kstore.pullImmediate()
 
-        for handler in on_mouse_moved_handlers:
-            kstore.pushImmediate()
-            handler[0](x,y)
-            kstore.pullImmediate()
+        now = kstore.elapsed_timer.elapsed()
+        for handler in on_mouse_moved_handlers.get():
+            throttle = handler[2]
+            if throttle is not None:
+                if now - throttle[1] < throttle[0]:
+                    # too early: the latest position is delivered by flushMouseMoves
+                    self.mouse_move_stats["throttled"] += 1
+                    throttle[2] = (x, y)
+                    continue
+                throttle[1] = now
+                throttle[2] = None
+            handler[0](x,y)  # submit of onMouseMove pushes and pulls the immediate mode
 
     def isButtonPressed(self, button):
         return button in self.button_store
@@ -4803,7 +7704,7 @@ def _cleanup():
 
 # ==================================== PUBLIC INTERFACE ===========================================
 
-__all__ = ['showGrid', 'maximizeWindow', 'setWindowWidth', 'setWindowHeight', 'getWindowWidth', 'getWindowHeight', 'setWindowSize', 'getWindowSize', 'drawEllipse', 'drawCircle', 'drawRect', 'drawLine', 'drawLineTo', 'drawVector', 'drawVectorTo', 'drawTriangle', 'drawRoundedRect', 'drawArc', 'drawPoly', 'setAnim', 'setDelay', 'setTime', 'disableAnim', 'getAnim', 'getDelay', 'delay', 'setPos', 'getPos', 'getX', 'setX', 'setY', 'getY', 'setRot', 'getRot', 'move', 'forward', 'backward', 'left', 'right', 'up', 'down', 'rotate', 'penDown', 'penUp', 'setLine', 'getLine', 'setFill', 'getFill', 'setColorMixing', 'getColorMixing', 'getDefaultColor', 'setColor', 'getColor', 'setFillColor', 'getFillColor', 'setLineColor', 'getLineColor', 'setBackgroundColor', 'getBackgroundColor', 'setLineWidth', 'getLineWidth', 'saveAsPng', 'onTick', 'removeOnTick', 'setFrameTick', 'getTick', 'setFps', 'getFps', 'onKeyPress', 'removeOnKeyPress', 'onKeyRelease', 'removeOnKeyRelease', 'onMousePress', 'removeOnMousePress', 'onMouseRelease', 'removeOnMouseRelease', 'onMouseMove', 'removeOnMouseMove', 'isKeyPressed', 'isMousePressed', 'getMousePos', 'getMouseX', 'getMouseY', 'drawInput', 'drawLabel', 'drawText', 'drawButton', 'setFontSize', 'getFontSize', 'setFontColor', 'getFontColor', 'setAnimationType', 'showCursor', 'clear', "getListSample", "beginRecording", "endRecording", "waitForFinish", "saveAsGif", "saveAsMp4", "drawImage", "getRainbow", "drawList"]
+__all__ = ['showGrid', 'maximizeWindow', 'setWindowWidth', 'setWindowHeight', 'getWindowWidth', 'getWindowHeight', 'setWindowSize', 'getWindowSize', 'drawEllipse', 'drawCircle', 'drawRect', 'drawLine', 'drawLineTo', 'drawVector', 'drawVectorTo', 'drawTriangle', 'drawRoundedRect', 'drawArc', 'drawPoly', 'setAnim', 'setDelay', 'setTime', 'disableAnim', 'getAnim', 'getDelay', 'delay', 'setPos', 'getPos', 'getX', 'setX', 'setY', 'getY', 'setRot', 'getRot', 'move', 'forward', 'backward', 'left', 'right', 'up', 'down', 'rotate', 'penDown', 'penUp', 'setLine', 'getLine', 'setFill', 'getFill', 'setColorMixing', 'getColorMixing', 'getDefaultColor', 'setColor', 'getColor', 'setFillColor', 'getFillColor', 'setLineColor', 'getLineColor', 'setBackgroundColor', 'getBackgroundColor', 'setLineWidth', 'getLineWidth', 'saveAsPng', 'onTick', 'removeOnTick', 'setFrameTick', 'getTick', 'setFps', 'getFps', 'onKeyPress', 'removeOnKeyPress', 'onKeyRelease', 'removeOnKeyRelease', 'onMousePress', 'removeOnMousePress', 'onMouseRelease', 'removeOnMouseRelease', 'onMouseMove', 'removeOnMouseMove', 'isKeyPressed', 'isMousePressed', 'getMousePos', 'getMouseX', 'getMouseY', 'drawInput', 'drawLabel', 'drawText', 'drawButton', 'setFontSize', 'getFontSize', 'setFontColor', 'getFontColor', 'setAnimationType', 'showCursor', 'clear', "getListSample", "beginRecording", "endRecording", "waitForFinish", "saveAsGif", "saveAsMp4", "drawImage", "getRainbow", "drawList", "setRenderer", "getRenderer", "getGeometryCacheStats", "getGlyphAtlasStats", "getHitGridStats", "setMouseMoveMode", "getMouseMoveMode", "getMouseMoveStats", "setTextMode", "getTextMode", "setWordTextureBudget", "getWordTextureStats", "setStencilThreshold", "getStencilThreshold"]
 
 def createWindow(width=1000, height=1000):
     """
@@ -4951,6 +7852,7 @@ def run():
     action_queue.add(kAction(_cleanup))
     
     kstore.main_timer = QTimer()
+    kstore.main_timer.timeout.connect(lambda: kstore.window.flushMouseMoves())
     kstore.main_timer.timeout.connect(lambda: action_queue.process())
     kstore.main_timer.timeout.connect(lambda: kstore.window.update())
     kstore.main_timer.start(kstore.dt)
@@ -5407,6 +8309,130 @@ def getDefaultColor():
     """
     return [255,200,50, 255]
 
+def setRenderer(renderer):
+    """
+        set how shapes are sent to the graphics card
+
+        - "batch" (default): all shapes are packed into a few large buffers and drawn together (fast for many shapes)
+        - "instanced": like "batch", but circles, ellipses, rects, rounded rects and arcs are drawn by a shader without any vertices,
+          so changing their size costs nothing (needs OpenGL 3.3, borders use the shape's line width)
+        - "displaylist": every shape is drawn on its own (the old way, use it if "batch" causes problems)
+    """
+    if renderer not in ("batch", "instanced", "displaylist"):
+        raise ValueError("renderer must be \"batch\", \"instanced\" or \"displaylist\"")
+
+    kstore.renderer = renderer
+    shapes = list(shape_buffer)
+    if kstore.cursor is not None:
+        shapes.append(kstore.cursor)
+
+    for shape in shapes:
+        if shape._vertices_stale or (shape._vbo is None and shape._primitive is not None and not shape._isInstanced()):
+            shape._updateShape()
+        shape._draw()
+    the_renderer.invalidate()
+
+def getRenderer():
+    """
+        get the current renderer ("batch", "instanced" or "displaylist")
+    """
+    return kstore.renderer
+
+def setStencilThreshold(vertex_count):
+    """
+        polygons with more vertices are filled with the stencil buffer instead of being cut into triangles
+        (for shapes with fill rule "auto", see shape.setFillRule)
+
+        **example**
+        - setStencilThreshold(100)
+    """
+    kstore.stencil_threshold = vertex_count
+    for shape in shape_buffer:
+        shape._drawFillRule()
+
+def getStencilThreshold():
+    """
+        get the number of vertices above which polygons are filled with the stencil buffer (default 256)
+    """
+    return kstore.stencil_threshold
+
+def getGeometryCacheStats():
+    """
+        get the hits and misses of the cache, which shares the vertices of circles, ellipses, arcs and rounded rects
+
+        **example**
+        - print(getGeometryCacheStats()["vertices"]["hits"])
+    """
+    return geometry_cache.getStats()
+
+def setWordTextureBudget(megabytes):
+    """
+        set how much graphics memory the word textures of the "displaylist" renderer may use (default 64 megabytes)
+
+        - the least recently used textures are deleted first, textures used by texts are kept
+
+        **example**
+        - setWordTextureBudget(16)
+    """
+    the_word_buffer.setMaxBytes(int(megabytes * 1024 * 1024))
+
+def getWordTextureStats():
+    """
+        get the hits, misses, evictions and the size in bytes of the word texture cache
+
+        **example**
+        - print(getWordTextureStats()["bytes"])
+    """
+    return the_word_buffer.getStats()
+
+def getHitGridStats():
+    """
+        get the number of shapes and cells in the grid, which finds the shapes under the mouse,
+        and how many candidates its queries returned
+
+        **example**
+        - print(getHitGridStats()["candidates"])
+    """
+    return hit_grid.getStats()
+
+def setTextMode(mode):
+    """
+        set how the glyphs of texts, labels and inputs are drawn (with the "batch" and "instanced" renderer)
+
+        - "bitmap" (default): every glyph is rasterized for every font size (sharpest at small sizes)
+        - "sdf": every glyph is rasterized once per font as a signed distance field, all font sizes, scales and rotations
+          are drawn from it, so animating the font size rasterizes nothing
+
+        **example**
+        - setTextMode("sdf")
+    """
+    if mode not in ("bitmap", "sdf"):
+        raise ValueError("text mode must be \"bitmap\" or \"sdf\"")
+
+    kstore.text_mode = mode
+    for shape in list(shape_buffer):
+        if isinstance(shape, (kLabel, kInput)):
+            shape._drawText()
+        elif shape._glyphs is not None and not isinstance(shape, kTextBlock):
+            shape._updateShape()
+            shape._draw()
+    the_renderer.invalidate()
+
+def getTextMode():
+    """
+        get how the glyphs of texts are drawn ("bitmap" or "sdf")
+    """
+    return kstore.text_mode
+
+def getGlyphAtlasStats():
+    """
+        get the number of glyphs and texture pages of the glyph atlas, which all texts are drawn from
+
+        **example**
+        - print(getGlyphAtlasStats()["glyphs"])
+    """
+    return glyph_atlas.getStats()
+
 def setColorMixing(mixer):
     """
         set the color mixing (for transparent shapes) to "additive" or "subtractive"
@@ -5614,20 +8640,53 @@ def removeOnTick(tick_function):
     """
         removes the tick function
     """
-    i = 0
-    while i < len(action_queue):
-        action = action_queue[i]
-        if action.loop_function == tick_function:
-            action_queue.pop(i)
-        else:
-            i = i + 1
+    action_queue.remove(lambda action: getattr(action, "loop_function", None) == tick_function)
     
 
-on_key_pressed_handlers = []
-on_key_released_handlers = []
-on_mouse_pressed_handlers = []
-on_mouse_released_handlers = []
-on_mouse_moved_handlers = []
+class kHandlerRegistry:
+    """
+        the handlers of one kind of input event, indexed by their key or button (None for handlers of all keys)
+
+        - adding and removing a handler takes the same time, no matter how many handlers there are
+        - an event only visits the handlers of its key and those of all keys, in the order they were added
+    """
+    def __init__(self):
+        self.entries = {}  # {key: {number: entry}}, numbers grow, so the dictionaries keep the order of adding
+        self.numbers = {}  # {handler_function: {number: key}}
+        self.counter = itertools.count()
+
+    def add(self, key, handler_function, entry):
+        number = next(self.counter)
+        self.entries.setdefault(key, {})[number] = entry
+        self.numbers.setdefault(handler_function, {})[number] = key
+
+    def remove(self, handler_function):
+        for number, key in self.numbers.pop(handler_function, {}).items():
+            entries = self.entries[key]
+            del entries[number]
+            if not entries:
+                del self.entries[key]
+
+    def get(self, key=None):
+        """
+            returns the entries for the key and for all keys (a copy, so handlers can add and remove handlers)
+        """
+        general = self.entries.get(None, {})
+        specific = self.entries.get(key, {}) if key is not None else {}
+        if not specific:
+            return list(general.values())
+        if not general:
+            return list(specific.values())
+        return [entry for _, entry in sorted(itertools.chain(general.items(), specific.items()), key=lambda item: item[0])]
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.entries.values())
+
+on_key_pressed_handlers = kHandlerRegistry()
+on_key_released_handlers = kHandlerRegistry()
+on_mouse_pressed_handlers = kHandlerRegistry()
+on_mouse_released_handlers = kHandlerRegistry()
+on_mouse_moved_handlers = kHandlerRegistry()
 
 def onKeyPress(handler_function, key=None):
     """
@@ -5643,25 +8702,16 @@ def onKeyPress(handler_function, key=None):
     """
     def submit(the_key):
         kstore.pushImmediate()
-        if key is not None and the_key == key:                  
-            handler_function(the_key)
-        elif key is None:
-            handler_function(the_key)
+        handler_function(the_key)
         kstore.pullImmediate()
 
-    on_key_pressed_handlers.append((submit, key, handler_function))
+    on_key_pressed_handlers.add(key, handler_function, (submit, key, handler_function))
 
 def removeOnKeyPress(handler_function):
     """
         removes the key press handler
     """
-    target = on_key_pressed_handlers
-    i = 0
-    while i < len(target):
-        if target[i][2] == handler_function:
-            target.pop(i)
-        else:
-            i += 1
+    on_key_pressed_handlers.remove(handler_function)
 
 def onKeyRelease(handler_function, key=None):
     """
@@ -5677,13 +8727,10 @@ def onKeyRelease(handler_function, key=None):
     """
     def submit(the_key):
         kstore.pushImmediate()
-        if key is not None and the_key == key:                  
-            handler_function(the_key)
-        elif key is None:
-            handler_function(the_key)
-        kstore.pushImmediate()
+        handler_function(the_key)
+        kstore.pullImmediate()
 
-    on_key_released_handlers.append((submit, key, handler_function))
+    on_key_released_handlers.add(key, handler_function, (submit, key, handler_function))
 
     return submit
 
@@ -5692,13 +8739,7 @@ def removeOnKeyRelease(handler_function):
     """
         removes the key release handler
     """
-    target = on_key_released_handlers
-    i = 0
-    while i < len(target):
-        if target[i][2] == handler_function:
-            target.pop(i)
-        else:
-            i += 1
+    on_key_released_handlers.remove(handler_function)
 
     
 def onMousePress(handler_function, button=None):
@@ -5719,25 +8760,16 @@ def onMousePress(handler_function, button=None):
     """
     def submit(x, y, the_button):
         kstore.pushImmediate()
-        if button is not None and the_button == button:                  
-            handler_function(x, y, the_button)
-        elif button is None:
-            handler_function(x, y, the_button)
+        handler_function(x, y, the_button)
         kstore.pullImmediate()
 
-    on_mouse_pressed_handlers.append((submit, button , handler_function))
+    on_mouse_pressed_handlers.add(button, handler_function, (submit, button, handler_function))
 
 def removeOnMousePress(handler_function):
     """
         removes the key press handler
     """
-    target = on_mouse_pressed_handlers
-    i = 0
-    while i < len(target):
-        if target[i][2] == handler_function:
-            target.pop(i)
-        else:
-            i += 1
+    on_mouse_pressed_handlers.remove(handler_function)
 
     
 def onMouseRelease(handler_function, button=None):
@@ -5758,58 +8790,81 @@ def onMouseRelease(handler_function, button=None):
     """
     def submit(x, y, the_button):
         kstore.pushImmediate() 
-        if button is not None and the_button == button:                  
-            handler_function(x,y, the_button)
-        elif button is None:
-            handler_function(x, y, the_button)
+        handler_function(x, y, the_button)
         kstore.pullImmediate()
 
-    on_mouse_released_handlers.append((submit, button, handler_function))
+    on_mouse_released_handlers.add(button, handler_function, (submit, button, handler_function))
     return submit
 
 def removeOnMouseRelease(handler_function):
     """
         removes the key press handler
     """
-    target = on_mouse_released_handlers
-    i = 0
-    while i < len(target):
-        if target[i][2] == handler_function:
-            target.pop(i)
-        else:
-            i += 1
+    on_mouse_released_handlers.remove(handler_function)
 
-def onMouseMove(handler_function):
+def onMouseMove(handler_function, max_rate=None):
     """
         executes the handler_function(x,y) if a the mouse has moved
         
         - the handler_function excpects a two arguments *x* and *y*
+        - with a max_rate, the handler_function is executed at most max_rate times per second,
+          the moves in between are skipped (but the last position is always delivered)
 
         **examples**
 
         def handler(x,y):
             print(x,y)
         onMouseMove(handler) 
+        onMouseMove(handler, 30) *# at most 30 times per second*
     """
 
     def submit(x,y):
         kstore.pushImmediate() 
         handler_function(x,y)
-        kstore.pushImmediate()
+        kstore.pullImmediate()
 
-    on_mouse_moved_handlers.append((submit, handler_function))
+    # [minimum milliseconds between two calls, time of the last call, skipped position]
+    throttle = [1000 / max_rate, -math.inf, None] if max_rate else None
+    on_mouse_moved_handlers.add(None, handler_function, (submit, handler_function, throttle))
 
 def removeOnMouseMove(handler_function):
     """
         removes the mouse move handler
     """
-    target = on_mouse_moved_handlers
-    i = 0
-    while i < len(target):
-        if target[i][1] == handler_function:
-            target.pop(i)
-        else:
-            i += 1
+    on_mouse_moved_handlers.remove(handler_function)
+
+def setMouseMoveMode(mode):
+    """
+        set when mouse moves are dispatched (to onMouseMove handlers and mouse enter / exit of shapes)
+
+        - "immediate" (default): every move, as soon as it happens
+        - "frame": at most once per frame with the latest position (for mice, which send many hundred moves per second)
+
+        **example**
+        - setMouseMoveMode("frame")
+    """
+    if mode not in ("immediate", "frame"):
+        raise ValueError("mouse move mode must be \"immediate\" or \"frame\"")
+
+    kstore.mouse_move_mode = mode
+    if mode == "immediate" and kstore.window is not None and kstore.window.pending_move is not None:
+        kstore.window.flushMouseMoves()
+
+def getMouseMoveMode():
+    """
+        get when mouse moves are dispatched ("immediate" or "frame")
+    """
+    return kstore.mouse_move_mode
+
+def getMouseMoveStats():
+    """
+        get the number of mouse move events, how many of them were dispatched, how many were coalesced
+        (replaced by a later move in "frame" mode) and how many handler calls were throttled (see onMouseMove)
+
+        **example**
+        - print(getMouseMoveStats()["coalesced"])
+    """
+    return dict(kstore.window.mouse_move_stats)
 
 def isKeyPressed(key):
     """
@@ -6083,9 +9138,12 @@ def _clear():
         shape = shape_buffer[i]
         if shape._ready and not shape._ui:
             shape_buffer.pop(i)
+            hit_grid.remove(shape)
+            focus_manager.blur(shape)
         else:
             i = i + 1
 
+    the_renderer.invalidate()
     kstore.window.update()
 
 def clear():
@@ -0,0 +1,79 @@
+"""
+    differential test of replaceLatex: the compiled single pass translator must give the same output
+    as the replace chain it replaced (symbols, then subscripts, then superscripts)
+"""
+import atexit
+import itertools
+import os
+import random
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import ksbanim
+
+# importing ksbanim opens the window and runs it at exit
+atexit.unregister(ksbanim.run)
+
+
+def replace_chain(text):
+    # the original replaceLatex
+    text = str(text)
+    for latex_symbol, unicode_symbol in ksbanim.LATEX_TO_UNICODE.items():
+        text = text.replace(latex_symbol, unicode_symbol)
+    for subscript, unicode_subscript in ksbanim.LATEX_SUBSCRIPTS.items():
+        text = text.replace(subscript, unicode_subscript)
+    for superscript, unicode_superscript in ksbanim.LATEX_SUPERSCRIPTS.items():
+        text = text.replace(superscript, unicode_superscript)
+    return text
+
+
+TOKENS = list(ksbanim.LATEX_TO_UNICODE) + list(ksbanim.LATEX_SUBSCRIPTS) + list(ksbanim.LATEX_SUPERSCRIPTS)
+
+
+def check(texts):
+    for text in texts:
+        expected = replace_chain(text)
+        assert ksbanim.replaceLatex(text) == expected, text
+        # a second call comes from the cache
+        assert ksbanim.replaceLatex(text) == expected, text
+
+
+def test_every_token():
+    check(TOKENS)
+    check("x" + token + "y" for token in TOKENS)
+    check(token + token for token in TOKENS)
+
+
+def test_pairs_of_tokens():
+    check(first + second for first, second in itertools.product(TOKENS, repeat=2))
+    check(first + " " + second for first, second in itertools.product(TOKENS, repeat=2))
+
+
+def test_overlapping_prefixes():
+    # a token, which is cut off, followed by another token (e.g. \\e + \\eta, \\vare + psilon)
+    texts = []
+    for token in TOKENS:
+        for length in range(1, len(token)):
+            prefix = token[:length]
+            texts.append(prefix)
+            texts.extend(prefix + other for other in TOKENS)
+            texts.append(prefix + token[length:] + token[length:])
+    check(texts)
+
+
+def test_subscript_and_superscript_runs():
+    characters = "ab_^1\\q"
+    check("".join(run) for length in range(1, 6) for run in itertools.product(characters, repeat=length))
+    check(["^_b", "^_b_1", "x^_b^2", "^^2", "__1", "_^2", "^_", "_", "^", "a_1_2^3^b", "\\\\alpha_1^2"])
+
+
+def test_random_texts():
+    rng = random.Random(20)
+    fragments = TOKENS + ["\\", "\\\\", "_", "^", "a", "b", "1", " ", "x", "alpha", "eta", "ä", "∑"]
+    check("".join(rng.choice(fragments) for _ in range(rng.randint(1, 12))) for _ in range(20000))
+
+
+def test_text_without_tokens():
+    check(["", "plain text", "1 + 2 = 3", 42, 3.5])